@@ -1,7 +1,248 @@
-import sys
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pymongo import MongoClient, ASCENDING, DESCENDING
 from pymongo.errors import ConnectionFailure, OperationFailure, ConfigurationError
-from typing import List, Dict, Optional, Any, Tuple
+from typing import List, Dict, Optional, Any, Tuple, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Default timeout used for server selection on new clients.
+_CLIENT_TIMEOUT_MS = 5000
+
+# Cache of MongoClient instances keyed by (uri, timeout). PyMongo maintains its
+# own connection pool per client (and re-registers it after fork), so reusing a
+# client avoids paying a fresh TCP/TLS handshake and server discovery on every
+# call.
+_client_cache: Dict[Tuple[str, int], MongoClient] = {}
+_client_cache_lock = threading.Lock()
+
+
+def _get_client(mongo_uri: str, timeout_ms: int = _CLIENT_TIMEOUT_MS) -> MongoClient:
+    """Returns a cached MongoClient for the given URI, creating one if needed.
+
+    The connection is only probed (via 'ismaster') when the client is first
+    created; subsequent calls reuse the pooled connections.
+    """
+    key = (mongo_uri, timeout_ms)
+    client = _client_cache.get(key)
+    if client is not None:
+        return client
+
+    with _client_cache_lock:
+        # Re-check under the lock so concurrent callers don't race-create clients.
+        client = _client_cache.get(key)
+        if client is None:
+            # Lean codec settings: plain dicts, naive datetimes, and a fixed
+            # UUID representation keep per-document decode cost down compared
+            # to the negotiated defaults.
+            client = MongoClient(
+                mongo_uri,
+                serverSelectionTimeoutMS=timeout_ms,
+                document_class=dict,
+                tz_aware=False,
+                uuidRepresentation='standard',
+            )
+            try:
+                # The ismaster command is cheap and does not require auth.
+                # Checks if the server is available before caching the client.
+                client.admin.command('ismaster')
+            except Exception:
+                # Never cache a client that failed its probe; close it so its
+                # monitor threads and sockets don't leak on every retry.
+                client.close()
+                raise
+            _client_cache[key] = client
+    return client
+
+
+def close_all_clients() -> None:
+    """Closes and discards all cached MongoClient instances.
+
+    Intended for application shutdown; clients are re-created on demand.
+    """
+    with _client_cache_lock:
+        for client in _client_cache.values():
+            client.close()
+        _client_cache.clear()
+
+
+# Sorted+limited queries are routed through an aggregation pipeline (see
+# execute_mongodb_query_iter) as long as the skip stays below this; past it
+# the top-K window the server must hold ($skip + $limit documents) grows too
+# large for the optimization to pay off.
+_AGG_SKIP_THRESHOLD = 10_000
+
+
+def execute_mongodb_query_iter(
+    mongo_uri: str,
+    db_name: str,
+    collection_name: str,
+    query_filter: Dict[str, Any],
+    projection: Optional[Dict[str, Any]] = None,
+    limit: int = 0, # 0 means no limit
+    skip: int = 0,
+    sort: Optional[List[Tuple[str, int]]] = None,
+    batch_size: int = 1000
+) -> Iterator[Dict[str, Any]]:
+    """
+    Executes a MongoDB find query and yields matching documents as they stream in.
+
+    Unlike execute_mongodb_query, results are not materialized into a list:
+    documents are fetched in server-side batches (of at most batch_size
+    documents; the server additionally caps each batch at 16 MiB) and yielded
+    one by one, so peak memory stays proportional to a single batch and the
+    first result is available after one round-trip.
+
+    Args:
+        mongo_uri (str): The MongoDB connection URI.
+        db_name (str): The name of the database.
+        collection_name (str): The name of the collection.
+        query_filter (Dict[str, Any]): The filter document for the find query.
+        projection (Optional[Dict[str, Any]], optional): The projection document.
+            Defaults to None (all fields).
+        limit (int, optional): The maximum number of documents to return.
+            Defaults to 0 (no limit).
+        skip (int, optional): The number of documents to skip. Defaults to 0.
+        sort (Optional[List[Tuple[str, int]]], optional): A list of
+            (key, direction) pairs to sort the results. Defaults to None.
+        batch_size (int, optional): Number of documents requested per server
+            batch. Defaults to 1000.
+
+    Returns:
+        Iterator[Dict[str, Any]]: An iterator over the matching documents.
+
+    Raises:
+        TypeError: If input types are incorrect (e.g., query_filter not a dict).
+        ValueError: If limit, skip, or batch_size are negative.
+    """
+    if not isinstance(query_filter, dict):
+        raise TypeError("query_filter must be a dictionary.")
+    if limit < 0:
+        raise ValueError("limit cannot be negative.")
+    if skip < 0:
+        raise ValueError("skip cannot be negative.")
+    if batch_size < 0:
+        raise ValueError("batch_size cannot be negative.")
+
+    client = _get_client(mongo_uri)
+    collection = client[db_name][collection_name]
+
+    # Sorted and limited: run as an aggregation so the server can use its
+    # SORT+LIMIT top-K optimization — it keeps a heap of skip+limit documents
+    # instead of sorting the full match set, and only `limit` documents ever
+    # cross the wire.
+    if sort and limit > 0 and skip < _AGG_SKIP_THRESHOLD:
+        pipeline = [{"$match": query_filter}, {"$sort": dict(sort)}]
+        if skip > 0:
+            pipeline.append({"$skip": skip})
+        pipeline.append({"$limit": limit})
+        if projection:
+            pipeline.append({"$project": projection})
+        cursor = collection.aggregate(
+            pipeline, batchSize=min(limit, batch_size) if batch_size > 0 else limit
+        )
+        return _iterate_cursor(cursor)
+
+    cursor = collection.find(query_filter, **_find_kwargs(projection, limit, skip, sort, batch_size))
+    return _iterate_cursor(cursor)
+
+
+def _find_kwargs(
+    projection: Optional[Dict[str, Any]],
+    limit: int,
+    skip: int,
+    sort: Optional[List[Tuple[str, int]]],
+    batch_size: int,
+) -> Dict[str, Any]:
+    """Packs the optional find() arguments into one kwargs dict.
+
+    Passing everything to find() in a single call builds the cursor spec
+    once, instead of re-validating it through a chain of sort/skip/limit/
+    batch_size mutator calls; unset options are simply omitted.
+    """
+    kwargs: Dict[str, Any] = {}
+    if projection:
+        kwargs["projection"] = projection
+    if sort:
+        kwargs["sort"] = sort
+    if skip > 0:
+        kwargs["skip"] = skip
+    if limit > 0:
+        kwargs["limit"] = limit
+        if batch_size > 0:
+            kwargs["batch_size"] = min(limit, batch_size)
+    elif batch_size > 0:
+        kwargs["batch_size"] = batch_size
+    return kwargs
+
+
+def _iterate_cursor(cursor) -> Iterator[Dict[str, Any]]:
+    """Yields documents from a cursor, closing it even on early exit."""
+    try:
+        yield from cursor
+    finally:
+        cursor.close()
+
+
+def execute_mongodb_query_raw(
+    mongo_uri: str,
+    db_name: str,
+    collection_name: str,
+    query_filter: Dict[str, Any],
+    projection: Optional[Dict[str, Any]] = None,
+    limit: int = 0, # 0 means no limit
+    skip: int = 0,
+    sort: Optional[List[Tuple[str, int]]] = None,
+    batch_size: int = 1000
+) -> Iterator[bytes]:
+    """
+    Executes a MongoDB find query and yields raw BSON batches as bytes.
+
+    Each yielded value is one server batch: a concatenation of BSON
+    documents that bson.decode_all() turns into a list of dicts. Skipping
+    the per-document BSON-to-dict decode makes this the cheapest path for
+    callers that forward results elsewhere (serialize to JSON, write to a
+    file, stream to another service) and would otherwise decode documents
+    just to re-encode them.
+
+    Args:
+        mongo_uri (str): The MongoDB connection URI.
+        db_name (str): The name of the database.
+        collection_name (str): The name of the collection.
+        query_filter (Dict[str, Any]): The filter document for the find query.
+        projection (Optional[Dict[str, Any]], optional): The projection document.
+            Defaults to None (all fields).
+        limit (int, optional): The maximum number of documents to return.
+            Defaults to 0 (no limit).
+        skip (int, optional): The number of documents to skip. Defaults to 0.
+        sort (Optional[List[Tuple[str, int]]], optional): A list of
+            (key, direction) pairs to sort the results. Defaults to None.
+        batch_size (int, optional): Number of documents requested per server
+            batch. Defaults to 1000.
+
+    Returns:
+        Iterator[bytes]: An iterator over raw BSON batches.
+
+    Raises:
+        TypeError: If input types are incorrect (e.g., query_filter not a dict).
+        ValueError: If limit, skip, or batch_size are negative.
+    """
+    if not isinstance(query_filter, dict):
+        raise TypeError("query_filter must be a dictionary.")
+    if limit < 0:
+        raise ValueError("limit cannot be negative.")
+    if skip < 0:
+        raise ValueError("skip cannot be negative.")
+    if batch_size < 0:
+        raise ValueError("batch_size cannot be negative.")
+
+    client = _get_client(mongo_uri)
+    collection = client[db_name][collection_name]
+
+    cursor = collection.find_raw_batches(query_filter, **_find_kwargs(projection, limit, skip, sort, batch_size))
+    return _iterate_cursor(cursor)
+
 
 def execute_mongodb_query(
     mongo_uri: str,
@@ -54,75 +295,95 @@ def execute_mongodb_query(
     if skip < 0:
         raise ValueError("skip cannot be negative.")
 
-    client: Optional[MongoClient] = None
     results: List[Dict[str, Any]] = []
 
-    print(f"Attempting to connect to MongoDB at {mongo_uri}...")
     try:
-        # Connect to MongoDB - added timeout for robustness
-        client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
-
-        # The ismaster command is cheap and does not require auth.
-        # Checks if the server is available.
-        client.admin.command('ismaster')
-        print("Connection successful.")
-
-        db = client[db_name]
-        collection = db[collection_name]
-        print(f"Executing find on {db_name}.{collection_name}...")
-        print(f"  Filter: {query_filter}")
-        if projection:
-            print(f"  Projection: {projection}")
-        if limit > 0:
-            print(f"  Limit: {limit}")
-        if skip > 0:
-            print(f"  Skip: {skip}")
-        if sort:
-            print(f"  Sort: {sort}")
+        # repr() of large filter/projection dicts is itself expensive, so only
+        # format the details when debug logging is actually enabled.
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Executing find on %s.%s: filter=%r projection=%r limit=%d skip=%d sort=%r",
+                db_name, collection_name, query_filter, projection, limit, skip, sort,
+            )
 
-        # Build the find command dynamically
-        cursor = collection.find(query_filter, projection if projection else None)
+        # Thin wrapper over the streaming variant: materialize the batches.
+        results = list(execute_mongodb_query_iter(
+            mongo_uri,
+            db_name,
+            collection_name,
+            query_filter,
+            projection=projection,
+            limit=limit,
+            skip=skip,
+            sort=sort,
+        ))
+        logger.info("Query executed. Found %d documents.", len(results))
 
-        if sort:
-            cursor = cursor.sort(sort)
-        if skip > 0:
-            cursor = cursor.skip(skip)
-        if limit > 0:
-            cursor = cursor.limit(limit)
-
-        # Execute the query and retrieve results
-        # Converting to list executes the query immediately
-        results = list(cursor)
-        print(f"Query executed. Found {len(results)} documents.")
-
-    except ConnectionFailure as e:
-        print(f"Error: Could not connect to MongoDB server at {mongo_uri}.", file=sys.stderr)
-        print(f"  Details: {e}", file=sys.stderr)
+    except ConnectionFailure:
+        logger.exception("Could not connect to MongoDB server at %s.", mongo_uri)
         raise # Re-raise the exception for the caller to handle
 
     except OperationFailure as e:
-        print(f"Error: MongoDB operation failed.", file=sys.stderr)
-        print(f"  Details: {e}", file=sys.stderr)
+        logger.exception("MongoDB operation failed.")
         # Check for common issues like authentication
         if "Authentication failed" in str(e):
-            print("  Hint: Check your username/password in the connection URI.", file=sys.stderr)
+            logger.error("Hint: Check your username/password in the connection URI.")
         raise # Re-raise
 
-    except ConfigurationError as e:
-         print(f"Error: Invalid MongoDB URI configuration.", file=sys.stderr)
-         print(f"  Details: {e}", file=sys.stderr)
-         raise # Re-raise
+    except ConfigurationError:
+        logger.exception("Invalid MongoDB URI configuration.")
+        raise # Re-raise
 
-    except Exception as e:
+    except Exception:
         # Catch any other unexpected errors during query execution
-        print(f"Error: An unexpected error occurred during query execution.", file=sys.stderr)
-        print(f"  Details: {e}", file=sys.stderr)
+        logger.exception("An unexpected error occurred during query execution.")
         raise # Re-raise
 
-    finally:
-        # Ensure the client connection is closed
-        if client:
-            print("Closing MongoDB connection.")
-            client.close()
+    # The client is intentionally not closed here: it is cached and its
+    # connection pool is shared across calls. Use close_all_clients() on
+    # application shutdown if an explicit teardown is needed.
+    return results
+
+
+# Cap on concurrent queries in execute_many; beyond this the queries are
+# still all executed, just not all in flight at once.
+_EXECUTE_MANY_MAX_WORKERS = 8
+
+
+def execute_many(
+    mongo_uri: str,
+    db_name: str,
+    queries: List[Dict[str, Any]],
+) -> List[List[Dict[str, Any]]]:
+    """
+    Executes several find queries concurrently and returns their results in order.
+
+    Issuing K queries sequentially costs K round-trips end to end; running
+    them on a thread pool overlaps the round-trips (PyMongo releases the GIL
+    during I/O and its connection pool is thread-safe), so wall time is
+    roughly one round-trip plus the slowest query.
+
+    Args:
+        mongo_uri (str): The MongoDB connection URI.
+        db_name (str): The name of the database.
+        queries (List[Dict[str, Any]]): One dict of keyword arguments per
+            query, as accepted by execute_mongodb_query (collection_name,
+            query_filter, and optionally projection, limit, skip, sort).
+
+    Returns:
+        List[List[Dict[str, Any]]]: The result list of each query, in the
+        same order as the input.
+
+    Raises:
+        Exception: The first exception raised by any of the queries, if any
+            fails; the remaining queries still run to completion.
+    """
+    if not queries:
+        return []
 
-    return results
\ No newline at end of file
+    with ThreadPoolExecutor(max_workers=min(_EXECUTE_MANY_MAX_WORKERS, len(queries))) as executor:
+        futures = [
+            executor.submit(execute_mongodb_query, mongo_uri, db_name, **query)
+            for query in queries
+        ]
+        return [future.result() for future in futures]
\ No newline at end of file
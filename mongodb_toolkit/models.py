@@ -1,4 +1,4 @@
-from pydantic.v1 import BaseModel, Field
+from pydantic import BaseModel, Field
 from typing import List, Dict, Optional, Any, Tuple
 
 # Re-import ASCENDING/DESCENDING or use literals 1/-1
@@ -7,6 +7,7 @@ from pymongo import ASCENDING, DESCENDING
 class GetSchemaInput(BaseModel):
     target_collection_name: Optional[str] = Field(None, description="Optional: Name of a specific collection to get the schema for. If None, schemas for all collections are returned.")
     sample_size: int = Field(10, description="Number of documents to sample for schema inference.")
+    projection: Optional[Dict[str, int]] = Field(None, description="Optional: Projection document limiting which fields are sampled and inferred (e.g., {'name': 1, 'address': 1}). Reduces data transferred for wide documents.")
 
 class ValidateSyntaxInput(BaseModel):
     query_doc: Dict[str, Any] = Field(..., description="The MongoDB query filter document (as a dictionary) to validate.")
@@ -22,4 +23,5 @@ class ExecuteQueryInput(BaseModel):
     projection: Optional[Dict[str, Any]] = Field(None, description="Optional: Projection document (e.g., {'_id': 0, 'name': 1}).")
     limit: int = Field(10, description="Optional: Maximum number of documents to return. Defaults to 10. Use 0 for no limit.")
     skip: int = Field(0, description="Optional: Number of documents to skip.")
-    sort: Optional[List[SortItem]] = Field(None, description="Optional: List of sort criteria. Each item should be an object with 'field' (string) and 'direction' (integer: 1 for ascending, -1 for descending).")
\ No newline at end of file
+    sort: Optional[List[SortItem]] = Field(None, description="Optional: List of sort criteria. Each item should be an object with 'field' (string) and 'direction' (integer: 1 for ascending, -1 for descending).")
+    as_json: bool = Field(False, description="Optional: If true, return the results as a single Extended JSON string instead of a list of documents.")
\ No newline at end of file
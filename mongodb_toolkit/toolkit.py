@@ -1,18 +1,123 @@
+import json
+import logging
+import os
 import sys
-from functools import lru_cache, wraps
-from typing import List, Dict, Optional, Any, Tuple, Union
-
-from pymongo import MongoClient, ASCENDING, DESCENDING
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Iterator, List, Dict, Optional, Any, Tuple, Union
+
+from pymongo import AsyncMongoClient, MongoClient, ASCENDING, DESCENDING
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.collection import Collection
 from pymongo.database import Database
 from pymongo.errors import ConnectionFailure, OperationFailure, ConfigurationError
 from langchain.tools import Tool, StructuredTool
-from pydantic.v1 import BaseModel
+from bson import json_util
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
 
 # Import models and utils
 from .models import GetSchemaInput, ValidateSyntaxInput, ExecuteQueryInput
 from .utils import generate_collection_schema, validate_query_syntax_recursive
 from .exceptions import ConfigurationError, SchemaError, ValidationError, ExecutionError
 
+logger = logging.getLogger(__name__)
+
+# How long an inferred collection schema stays fresh. Sampling and walking
+# documents is the dominant cost of schema discovery, and schemas change
+# rarely, so repeat agent calls within the window are served from memory.
+_SCHEMA_CACHE_TTL = 300.0
+
+# How long a listCollections result stays fresh. Namespaces change far less
+# often than they are listed, and on large deployments the round-trip
+# enumerates hundreds of them.
+_COL_NAMES_TTL = 60.0
+
+# The only directions find() accepts; a frozenset makes the membership test
+# a single hash probe.
+_VALID_SORT_DIRECTIONS = frozenset((ASCENDING, DESCENDING))
+
+# Codec options for the as_json path: RawBSONDocument keeps each result as
+# its BSON bytes and inflates values lazily while json_util serializes,
+# instead of eagerly materializing a full dict tree per document first.
+_RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+
+
+@lru_cache(maxsize=256)
+def _canonical_projection(items: Tuple[Tuple[str, Any], ...]) -> Dict[str, Any]:
+    """Rebuilds (and memoizes) a projection dict from its sorted item tuple."""
+    return dict(items)
+
+
+def _normalize_projection(projection: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Returns a canonical, shared projection dict for repeated query shapes.
+
+    Agents fire many queries with the same projection; memoizing on the
+    sorted items lets pymongo re-serialize one shared dict instead of a
+    fresh equivalent each call. Projections with unhashable values (e.g.
+    $slice specs) pass through unchanged.
+    """
+    if not projection:
+        return None
+    try:
+        return _canonical_projection(tuple(sorted(projection.items())))
+    except TypeError:
+        return projection
+
+
+# The success verdict every valid query returns; interning means the
+# countless "valid" results all share one string object.
+_VALID_MSG = sys.intern("Syntax is valid.")
+
+
+def _run_syntax_validation(query_doc: Dict[str, Any]) -> str:
+    """Walks query_doc and formats the validation verdict as a string."""
+    errors: List[str] = []
+    validate_query_syntax_recursive(query_doc, errors, path_prefix="")
+    if not errors:
+        return _VALID_MSG
+    return "Syntax validation errors found:\n" + "\n".join(f"- {e}" for e in errors)
+
+
+# Static tool metadata: names and argument schemas never vary per instance,
+# so they are resolved once at import time; get_tools only has to bind the
+# instance's methods and formatted descriptions.
+_SCHEMA_TOOL_META = ("get_mongodb_database_schema", GetSchemaInput)
+_VALIDATE_TOOL_META = ("validate_mongodb_query_syntax", ValidateSyntaxInput)
+_EXECUTE_TOOL_META = ("execute_mongodb_find_query", ExecuteQueryInput)
+
+# Description templates compiled once at import; only {db_name} varies, so
+# __init__ just formats them instead of rebuilding multi-hundred-byte
+# f-strings inline.
+_SCHEMA_DESC_TPL = (
+    "Use this tool to get the schema of collections within the '{db_name}' MongoDB database. "
+    "This is essential for understanding data structure before creating queries. "
+    "ARGUMENTS: "
+    "- target_collection_name (Optional[str]): The specific collection to get the schema for. "
+    "**IMPORTANT: Only provide this if the user explicitly names a collection OR if you are certain based on previous context. If unsure, OMIT this argument to get schemas for ALL collections.** "
+    "- sample_size (int, default=10): Number of documents to sample for inference."
+)
+_VALIDATE_DESC = "Use this tool to validate the basic syntax of a MongoDB query filter document (dictionary) before execution. Checks for valid operators and structure. Input is the 'query_doc'. Returns 'Syntax is valid.' or lists errors."
+_EXEC_DESC_TPL = (
+    "Use this tool to execute a MongoDB 'find' query against a specific collection in the '{db_name}' database "
+    "after validating its syntax. Provide arguments like 'collection_name', 'query_filter', etc. "
+    "By default, results are limited to 10 documents. You can override this by providing a different 'limit' value (use 0 for no limit). "
+    "Returns a list of matching documents, or a single Extended JSON string when 'as_json' is true."
+)
+
+
+@lru_cache(maxsize=1024)
+def _validate_syntax_cached(canonical_query: str) -> str:
+    """Validates a canonical-JSON query, memoizing the verdict.
+
+    Agents commonly resubmit the same (or key-reordered) filter during
+    retry loops; keying on a sorted-key JSON dump collapses those repeats
+    into one dict lookup instead of a full re-walk.
+    """
+    return _run_syntax_validation(json.loads(canonical_query))
+
 class MongoToolkit:
     """
     A toolkit for interacting with a specific MongoDB database, providing
@@ -21,10 +126,57 @@ class MongoToolkit:
     Instantiate this class with your MongoDB connection URI and database name.
     Then, use the get_tools() method to retrieve configured LangChain tools.
     """
-    _client: Optional[MongoClient] = None
-    _db: Optional[Database] = None
-
-    def __init__(self, mongo_uri: str, db_name: str):
+    # Slots pin the attribute set: lookups on the hot `is None` checks become
+    # C-slot reads instead of instance-dict probes, each instance drops its
+    # __dict__, and nothing can leak connection state onto the class.
+    __slots__ = (
+        "mongo_uri",
+        "db_name",
+        "_client",
+        "_db",
+        "_async_client",
+        "_async_db",
+        "_pid",
+        "_probe_on_connect",
+        "_init_lock",
+        "_client_options",
+        "_schema_cache",
+        "_col_cache",
+        "_col_names_cache",
+        "_col_names_set",
+        "_tool_descriptions",
+        "_tools",
+        "_initialized",
+    )
+
+    # One shared instance per (mongo_uri, db_name): re-instantiating the
+    # toolkit (e.g. per request in a multi-tenant server) reuses the existing
+    # connection pools and caches instead of opening fresh ones.
+    _instances: Dict[Tuple[str, str], "MongoToolkit"] = {}
+
+    def __new__(cls, mongo_uri: str = "", db_name: str = "", *args, **kwargs):
+        key = (mongo_uri, db_name)
+        instance = cls._instances.get(key)
+        if instance is not None and type(instance) is cls:
+            return instance
+        instance = super().__new__(cls)
+        cls._instances[key] = instance
+        return instance
+
+    def __init__(
+        self,
+        mongo_uri: str,
+        db_name: str,
+        max_pool_size: int = 50,
+        min_pool_size: int = 5,
+        max_idle_time_ms: int = 60000,
+        compressors: Optional[str] = "zstd,snappy,zlib",
+        read_preference: Optional[str] = None,
+        connect_timeout_ms: int = 5000,
+        socket_timeout_ms: int = 30000,
+        wait_queue_timeout_ms: int = 10000,
+        probe_on_connect: bool = False,
+    ):
         """
         Initializes the toolkit with connection details.
 
@@ -32,118 +184,443 @@ class MongoToolkit:
             mongo_uri (str): The MongoDB connection URI (e.g., "mongodb://...", "mongodb+srv://...").
                              Should be loaded securely (e.g., from environment variables).
             db_name (str): The name of the target database.
+            max_pool_size (int): Maximum connections kept in the pool.
+            min_pool_size (int): Connections kept warm even when idle.
+            max_idle_time_ms (int): How long an idle pooled connection survives.
+            compressors (Optional[str]): Comma-separated wire compressors to
+                negotiate with the server (unavailable ones are skipped by
+                pymongo). None disables compression.
+            read_preference (Optional[str]): Read preference name (e.g.
+                "secondaryPreferred"). None keeps pymongo's default (primary).
+            connect_timeout_ms (int): TCP connect timeout for new sockets.
+            socket_timeout_ms (int): Per-operation socket timeout, bounding
+                tail latency on a hung server.
+            wait_queue_timeout_ms (int): How long a thread waits for a free
+                pooled connection before failing fast.
+            probe_on_connect (bool): When True, issue a 'ping' right after
+                building a client to surface connectivity errors eagerly.
+                Off by default: MongoClient selects a server lazily, so the
+                first real operation performs (and reports) the same check
+                without spending an extra round-trip.
         """
         if not mongo_uri:
             raise ConfigurationError("mongo_uri cannot be empty.")
         if not db_name:
             raise ConfigurationError("db_name cannot be empty.")
 
+        # __new__ may have handed back an already-initialized shared instance;
+        # re-running __init__ would wipe its caches (later constructor kwargs
+        # are intentionally ignored for an existing (uri, db) pair).
+        if getattr(self, "_initialized", False):
+            return
+
         self.mongo_uri = mongo_uri
         self.db_name = db_name
-        print(f"MongoToolkit initialized for database '{self.db_name}'. Connection will be established on first use.")
+        # Instance attributes rather than class-level defaults: the
+        # `is None` checks on every tool call resolve in the instance dict
+        # without falling through the MRO, and subclasses can't accidentally
+        # share connection state through the class.
+        self._client: Optional[MongoClient] = None
+        self._db: Optional[Database] = None
+        self._async_client: Optional[AsyncMongoClient] = None
+        self._async_db: Optional[AsyncDatabase] = None
+        # PID that owns the cached clients; after a fork the child must not
+        # reuse sockets shared with the parent.
+        self._pid: int = os.getpid()
+        self._probe_on_connect = probe_on_connect
+        # Guards first-connection setup so concurrent threads racing into
+        # _get_db don't each build (and ping) their own MongoClient.
+        self._init_lock = threading.Lock()
+        # Shared options for both the sync and async client. Compression
+        # shrinks bytes-on-wire for the JSON-like documents this toolkit
+        # moves; the warm pool avoids handshakes on bursts of tool calls.
+        self._client_options: Dict[str, Any] = {
+            'serverSelectionTimeoutMS': 5000, # Timeout for connection attempt
+            'maxPoolSize': max_pool_size,
+            'minPoolSize': min_pool_size,
+            'maxIdleTimeMS': max_idle_time_ms,
+            'connectTimeoutMS': connect_timeout_ms,
+            'socketTimeoutMS': socket_timeout_ms,
+            'waitQueueTimeoutMS': wait_queue_timeout_ms,
+            'retryReads': True,
+            # Lean decode settings: plain dicts, naive datetimes and
+            # standard UUID handling keep pymongo on its fastest BSON
+            # decode path (no wrapper classes, no tz conversion, and UUIDs
+            # come back as uuid.UUID instead of raw Binary).
+            'document_class': dict,
+            'tz_aware': False,
+            'uuidRepresentation': 'standard',
+            # Attributes connections in the server logs / currentOp output.
+            'appname': f"mongodb-toolkit/{db_name}",
+        }
+        if compressors:
+            self._client_options['compressors'] = compressors
+        if read_preference:
+            self._client_options['readPreference'] = read_preference
+        # (db_name, collection_name, sample_size, fast_mode, projection items)
+        # -> (timestamp, schema)
+        self._schema_cache: Dict[Tuple[Any, ...], Tuple[float, Dict[str, Any]]] = {}
+        # Memoized Collection handles; db[name] allocates a new Collection
+        # (with name validation) on every lookup otherwise.
+        self._col_cache: Dict[str, Collection] = {}
+        # (timestamp, names) from the last listCollections round-trip, plus
+        # a lazily built frozenset of the same names for O(1) membership
+        # checks (kept in lockstep with the list cache).
+        self._col_names_cache: Optional[Tuple[float, List[str]]] = None
+        self._col_names_set: Optional[frozenset] = None
+        # Tool descriptions only depend on db_name; materialize them once
+        # here from the module-level templates instead of re-evaluating
+        # inline strings in get_tools().
+        self._tool_descriptions: Tuple[str, str, str] = (
+            _SCHEMA_DESC_TPL.format(db_name=db_name),
+            _VALIDATE_DESC,
+            _EXEC_DESC_TPL.format(db_name=db_name),
+        )
+        # Built once on the first get_tools() call; a plain attribute avoids
+        # lru_cache's locked lookup and its strong reference keeping the
+        # instance alive through the cache.
+        self._tools: Optional[List[Tool]] = None
+        self._initialized = True
+        logger.debug("MongoToolkit initialized for database '%s'. Connection will be established on first use.", db_name)
+
+    def _check_fork(self):
+        """Discards clients inherited across a fork.
+
+        gunicorn/uwsgi/multiprocessing fork after import; a MongoClient
+        carried over from the parent shares its sockets, which leads to
+        broken pipes and hangs. Detecting a PID change and rebuilding is
+        the canonical PyMongo post-fork pattern.
+        """
+        current_pid = os.getpid()
+        if self._pid != current_pid:
+            logger.debug("PID change detected (fork); discarding inherited MongoDB clients.")
+            # Best effort: closing in the child touches shared state, so
+            # swallow anything it raises and just drop the references.
+            try:
+                if self._client is not None:
+                    self._client.close()
+            except Exception:
+                pass
+            self._client = None
+            self._db = None
+            self._async_client = None
+            self._async_db = None
+            self._col_cache.clear()
+            self._pid = current_pid
 
     def _get_db(self) -> Database:
         """Establishes connection (if needed) and returns the Database object."""
+        self._check_fork()
         if self._client is None or self._db is None:
-            print(f"Establishing new MongoDB connection to database '{self.db_name}'...")
-            try:
-                self._client = MongoClient(
-                    self.mongo_uri,
-                    serverSelectionTimeoutMS=5000 # Timeout for connection attempt
-                )
-                # Test connection
-                self._client.admin.command('ping') # 'ping' is lightweight
-                self._db = self._client[self.db_name]
-                print("MongoDB connection successful.")
-            except ConfigurationError as e:
-                self._client = None
-                self._db = None
-                print(f"Error: Invalid MongoDB URI configuration: {e}", file=sys.stderr)
-                raise ConfigurationError(f"Invalid MongoDB URI configuration: {e}") from e
-            except ConnectionFailure as e:
-                self._client = None
-                self._db = None
-                print(f"Error: Could not connect to MongoDB server at {self.mongo_uri}. Details: {e}", file=sys.stderr)
-                raise ConfigurationError(f"Could not connect to MongoDB: {e}") from e
-            except Exception as e: # Catch other potential errors during init
-                self._client = None
-                self._db = None
-                print(f"Error: An unexpected error occurred during MongoDB connection: {e}", file=sys.stderr)
-                raise ConfigurationError(f"Unexpected error connecting to MongoDB: {e}") from e
+            # Double-checked locking: threads racing into a cold toolkit
+            # would otherwise each build a MongoClient and ping it; the
+            # re-check under the lock leaves one shared client and the
+            # losers just read it.
+            with self._init_lock:
+                if self._client is None or self._db is None:
+                    logger.debug("Establishing new MongoDB connection to database '%s'...", self.db_name)
+                    try:
+                        self._client = MongoClient(self.mongo_uri, **self._client_options)
+                        if self._probe_on_connect:
+                            # Optional eager connectivity check; by default the
+                            # first real operation triggers server selection and
+                            # reports the same failure, saving this round-trip.
+                            self._client.admin.command('ping')
+                        self._db = self._client[self.db_name]
+                        logger.debug("MongoDB connection successful.")
+                    except ConfigurationError as e:
+                        self._client = None
+                        self._db = None
+                        logger.error("Invalid MongoDB URI configuration: %s", e)
+                        raise ConfigurationError(f"Invalid MongoDB URI configuration: {e}") from e
+                    except ConnectionFailure as e:
+                        self._client = None
+                        self._db = None
+                        logger.error("Could not connect to MongoDB server at %s. Details: %s", self.mongo_uri, e)
+                        raise ConfigurationError(f"Could not connect to MongoDB: {e}") from e
+                    except Exception as e: # Catch other potential errors during init
+                        self._client = None
+                        self._db = None
+                        logger.error("An unexpected error occurred during MongoDB connection: %s", e)
+                        raise ConfigurationError(f"Unexpected error connecting to MongoDB: {e}") from e
 
         # Type checking reassurance
         if self._db is None:
              raise RuntimeError("Database object (_db) is unexpectedly None after connection attempt.") # Should not happen
         return self._db
 
+    async def _get_async_db(self) -> AsyncDatabase:
+        """Async counterpart of _get_db; connects lazily on first use.
+
+        A single AsyncMongoClient lets concurrent tool calls from an async
+        agent overlap their round-trips instead of serializing on one
+        blocking thread.
+        """
+        self._check_fork()
+        if self._async_client is None or self._async_db is None:
+            logger.debug("Establishing new async MongoDB connection to database '%s'...", self.db_name)
+            try:
+                self._async_client = AsyncMongoClient(self.mongo_uri, **self._client_options)
+                if self._probe_on_connect:
+                    await self._async_client.admin.command('ping')
+                self._async_db = self._async_client[self.db_name]
+                logger.debug("MongoDB connection successful.")
+            except ConnectionFailure as e:
+                self._async_client = None
+                self._async_db = None
+                logger.error("Could not connect to MongoDB server at %s. Details: %s", self.mongo_uri, e)
+                raise ConfigurationError(f"Could not connect to MongoDB: {e}") from e
+            except Exception as e:
+                self._async_client = None
+                self._async_db = None
+                logger.error("An unexpected error occurred during MongoDB connection: %s", e)
+                raise ConfigurationError(f"Unexpected error connecting to MongoDB: {e}") from e
+        return self._async_db
+
     def close(self):
         """Closes the MongoDB client connection, if open."""
         if self._client:
-            print("Closing MongoDB connection.")
+            logger.debug("Closing MongoDB connection.")
             self._client.close()
             self._client = None
             self._db = None
+            self._col_cache.clear()
+            self._col_names_cache = None
+            self._col_names_set = None
+
+    async def aclose(self):
+        """Closes the async MongoDB client (if open), then the sync one."""
+        if self._async_client:
+            logger.debug("Closing async MongoDB connection.")
+            await self._async_client.close()
+            self._async_client = None
+            self._async_db = None
+        self.close()
 
     def _get_db_schema_wrapper(self, **kwargs):
         """Internal wrapper to unpack args for get_db_schema from Pydantic."""
         try:
-            # Validate input using the Pydantic model
-            validated_args = GetSchemaInput(**kwargs)
+            # model_validate hands the kwargs dict straight to the compiled
+            # core validator, skipping the ** re-expansion __init__ does.
+            validated_args = GetSchemaInput.model_validate(kwargs)
         except Exception as e: # Catch Pydantic validation errors
              raise ValidationError(f"Invalid input arguments for get_database_schema: {e}") from e
 
         # Call the original function with unpacked arguments
         return self.get_db_schema(
             target_collection_name=validated_args.target_collection_name,
-            sample_size=validated_args.sample_size
+            sample_size=validated_args.sample_size,
+            projection=validated_args.projection
         )
 
+    @staticmethod
+    def _fast_type_stages(sample_size: int) -> List[Dict[str, Any]]:
+        """The $sample/$project stages that map documents to (field, $type) pairs."""
+        return [
+            {"$sample": {"size": sample_size}},
+            {"$project": {"fields": {"$map": {
+                "input": {"$objectToArray": "$$ROOT"},
+                "as": "kv",
+                "in": {"k": "$$kv.k", "t": {"$type": "$$kv.v"}},
+            }}}},
+        ]
+
+    @staticmethod
+    def _merge_fast_doc(schema: Dict[str, Any], doc: Dict[str, Any]) -> None:
+        """Folds one projected type-map document into a fast-mode schema."""
+        for entry in doc.get("fields", ()):
+            info = schema.get(entry["k"])
+            if info is None:
+                schema[entry["k"]] = {"types": {entry["t"]}}
+            else:
+                info["types"].add(entry["t"])
+
+    def _fast_collection_schema(self, collection, sample_size: int) -> Optional[Dict[str, Any]]:
+        """Infers a top-level-only schema with a server-side $type projection.
+
+        The $sample/$project pipeline maps each sampled document to a tiny
+        list of (field name, BSON type name) pairs on the server, so only
+        type metadata crosses the wire instead of full documents. Nested
+        document structure is not inspected.
+        """
+        schema: Dict[str, Any] = {}
+        try:
+            for doc in collection.aggregate(self._fast_type_stages(sample_size)):
+                self._merge_fast_doc(schema, doc)
+        except OperationFailure as e:
+            logger.error("Fast schema sampling failed for collection '%s': %s", collection.name, e)
+            return None
+        return schema or None
+
+    def _fast_db_schema(self, db: Database, names: List[str], sample_size: int) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Fast-mode inference for several collections in one round-trip.
+
+        The per-collection type-map pipelines are fused with $unionWith (each
+        branch tagged with its namespace via $addFields), so N collections
+        cost one aggregation instead of N. Returns None if the server rejects
+        the pipeline (e.g. pre-4.4, no $unionWith) so the caller can fall
+        back to per-collection sampling.
+        """
+        def branch(name: str) -> List[Dict[str, Any]]:
+            return self._fast_type_stages(sample_size) + [{"$addFields": {"_ns": name}}]
+
+        pipeline = branch(names[0]) + [
+            {"$unionWith": {"coll": name, "pipeline": branch(name)}}
+            for name in names[1:]
+        ]
+        schemas: Dict[str, Dict[str, Any]] = {name: {} for name in names}
+        try:
+            for doc in db[names[0]].aggregate(pipeline):
+                self._merge_fast_doc(schemas[doc["_ns"]], doc)
+        except OperationFailure as e:
+            logger.error("Batched fast schema sampling failed: %s", e)
+            return None
+        # Empty collections contribute no documents; drop their empty buckets.
+        return {name: schema for name, schema in schemas.items() if schema}
+
     def get_db_schema(
         self,
         target_collection_name: Optional[str] = None,
-        sample_size: int = 10
+        sample_size: int = 10,
+        fast_mode: bool = False,
+        projection: Optional[Dict[str, int]] = None
     ) -> Dict[str, Any]:
         """
         Generates and returns the inferred schema for collections within the database.
+
+        With fast_mode=True, only top-level field names and BSON type names
+        are computed (server-side), trading nested-structure detail for a
+        much smaller wire footprint.
+
+        A projection is pushed down to the server so sampling only returns
+        (and inference only walks) the requested fields; it is ignored in
+        fast_mode, which already ships only type metadata.
         """
-        print(f"Getting schema for database: '{self.db_name}'")
+        logger.debug("Getting schema for database: '%s'", self.db_name)
         db = self._get_db()
         database_schema = {}
 
         try:
+            # Work with plain name strings; Collection handles are only built
+            # for the collections that actually get sampled (cache misses),
+            # not one per namespace up front.
             if target_collection_name:
-                if target_collection_name not in db.list_collection_names():
+                if not isinstance(target_collection_name, str):
+                    raise SchemaError(f"target_collection_name must be a string, got {type(target_collection_name).__name__}.")
+                if target_collection_name not in self._collection_name_set(db):
                     raise SchemaError(f"Collection '{target_collection_name}' not found in database '{self.db_name}'.")
-                collections_to_inspect = [db[target_collection_name]]
-                print(f"Targeting specific collection: '{target_collection_name}'")
+                names_to_inspect = [target_collection_name]
+                logger.debug("Targeting specific collection: '%s'", target_collection_name)
             else:
-                collection_names = db.list_collection_names()
-                if not collection_names:
-                    print("Database contains no collections.")
+                names_to_inspect = self._list_collection_names(db)
+                if not names_to_inspect:
+                    logger.debug("Database contains no collections.")
                     return {}
-                collections_to_inspect = [db[name] for name in collection_names]
-                print(f"Found collections: {', '.join(collection_names)}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Found collections: %s", ', '.join(names_to_inspect))
+
+            now = time.monotonic()
+            # Different projections yield different schemas; the key must
+            # distinguish them (order-insensitively).
+            proj_key = tuple(sorted(projection.items())) if projection else None
+
+            if fast_mode and len(names_to_inspect) > 1:
+                # Fuse the uncached collections into one $unionWith round-trip
+                # and seed the cache; the loop below then serves every
+                # collection from cache (or falls back per-collection if the
+                # server lacks $unionWith).
+                uncached = [
+                    name for name in names_to_inspect
+                    if (hit := self._schema_cache.get((self.db_name, name, sample_size, True, None))) is None
+                    or now - hit[0] >= _SCHEMA_CACHE_TTL
+                ]
+                if len(uncached) > 1:
+                    batched = self._fast_db_schema(db, uncached, sample_size)
+                    if batched is not None:
+                        for name, schema in batched.items():
+                            self._schema_cache[(self.db_name, name, sample_size, True, None)] = (now, schema)
+
+            pending: List[Tuple[str, Tuple[Any, ...]]] = []
+            for name in names_to_inspect:
+                cache_key = (self.db_name, name, sample_size, fast_mode, None if fast_mode else proj_key)
+                hit = self._schema_cache.get(cache_key)
+                if hit is not None and now - hit[0] < _SCHEMA_CACHE_TTL:
+                    database_schema[name] = hit[1]
+                else:
+                    pending.append((name, cache_key))
+
+            def sample_one(name: str) -> Optional[Dict[str, Any]]:
+                logger.debug("Analyzing collection: '%s'", name)
+                collection = db[name]
+                if fast_mode:
+                    return self._fast_collection_schema(collection, sample_size)
+                return generate_collection_schema(collection, sample_size, projection=projection)
+
+            if len(pending) > 1:
+                # Sampling is round-trip bound; fanning out across a few
+                # threads overlaps the per-collection waits. PyMongo's
+                # connection pool is thread-safe, and the worker cap stays
+                # well under the default maxPoolSize.
+                with ThreadPoolExecutor(max_workers=min(8, len(pending))) as executor:
+                    sampled = list(executor.map(sample_one, (name for name, _ in pending)))
+            else:
+                sampled = [sample_one(name) for name, _ in pending]
 
-            for collection in collections_to_inspect:
-                print("-" * 20)
-                print(f"Analyzing collection: '{collection.name}'")
-                collection_schema = generate_collection_schema(collection, sample_size)
+            for (name, cache_key), collection_schema in zip(pending, sampled):
                 if collection_schema is not None:
-                    database_schema[collection.name] = collection_schema
+                    self._schema_cache[cache_key] = (now, collection_schema)
+                    database_schema[name] = collection_schema
 
-            return database_schema
+            # Misses were appended after the hits; hand back the schemas in
+            # listing order regardless.
+            return {name: database_schema[name] for name in names_to_inspect if name in database_schema}
 
         except OperationFailure as e:
+            # The cached namespace list may be what misled us (e.g. a dropped
+            # collection); don't keep serving it after a failure.
+            self._col_names_cache = None
+            self._col_names_set = None
             msg = f"MongoDB operation failed during schema generation: {e}"
-            print(msg, file=sys.stderr)
+            logger.error(msg)
             raise SchemaError(msg) from e
         except Exception as e:
+            self._col_names_cache = None
+            self._col_names_set = None
             msg = f"An unexpected error occurred during schema generation: {e}"
-            print(msg, file=sys.stderr)
+            logger.error(msg)
             # Log the full traceback here if possible
             raise SchemaError(msg) from e
 
 
+    def _list_collection_names(self, db: Database) -> List[str]:
+        """Returns the database's collection names, cached for a short TTL."""
+        now = time.monotonic()
+        cached = self._col_names_cache
+        if cached is not None and now - cached[0] < _COL_NAMES_TTL:
+            return cached[1]
+        # The type filter excludes views server-side, in the same command.
+        names = db.list_collection_names(filter={"type": "collection"})
+        self._col_names_cache = (now, names)
+        self._col_names_set = None
+        return names
+
+    def _collection_name_set(self, db: Database) -> frozenset:
+        """Returns the cached collection names as a frozenset for membership tests."""
+        names = self._list_collection_names(db)
+        # _list_collection_names drops the set whenever the list refreshes,
+        # so a non-None set always matches the current list.
+        if self._col_names_set is None:
+            self._col_names_set = frozenset(names)
+        return self._col_names_set
+
+    def clear_schema_cache(self):
+        """Discards all cached collection schemas; the next call re-samples."""
+        self._schema_cache.clear()
+
+    # Alias kept alongside clear_schema_cache; both names circulate in
+    # downstream code and they do the same thing.
+    invalidate_schema_cache = clear_schema_cache
+
     def validate_mongodb_query_syntax(self, query_doc: Dict[str, Any]) -> str:
         """
         Validates the basic syntax of a MongoDB query filter document.
@@ -151,34 +628,40 @@ class MongoToolkit:
         Returns:
             str: "Syntax is valid." or a string listing the syntax errors found.
         """
-        errors = []
         if not isinstance(query_doc, dict):
             return "Validation Error: Query root must be a dictionary."
-
-        validate_query_syntax_recursive(query_doc, errors, path_prefix="")
-
-        if not errors:
-            return "Syntax is valid."
-        else:
-            error_string = "Syntax validation errors found:\n" + "\n".join(f"- {e}" for e in errors)
-            # Raise error instead of returning string? Could be better for agent flow.
-            # raise ValidationError(error_string)
-            # For now, return string as per common tool patterns
-            return error_string
+        if not query_doc:
+            # {} (match everything) is by far the most common filter agents
+            # send; skip the walk and the canonical-JSON round-trip entirely.
+            return _VALID_MSG
+
+        # Raise error instead of returning string? Could be better for agent flow.
+        # raise ValidationError(error_string)
+        # For now, return string as per common tool patterns
+        try:
+            canonical_query = json.dumps(query_doc, sort_keys=True, separators=(',', ':'))
+        except (TypeError, ValueError):
+            # Filters containing non-JSON values (ObjectId, datetime, ...)
+            # can't be canonicalized; validate them directly.
+            return _run_syntax_validation(query_doc)
+        return _validate_syntax_cached(canonical_query)
 
     def _execute_query_wrapper(self, **kwargs):
         """Internal wrapper to unpack args from the Pydantic model."""
         try:
-            # Instantiate the Pydantic model to validate kwargs
-            validated_args = ExecuteQueryInput(**kwargs)
+            # See _get_db_schema_wrapper: model_validate avoids re-expanding
+            # the kwargs dict on every tool invocation.
+            validated_args = ExecuteQueryInput.model_validate(kwargs)
         except Exception as e: # Catch Pydantic validation errors
              raise ValidationError(f"Invalid input arguments for execute_find_query: {e}") from e
 
         # Prepare sort argument if present
         sort_list = None
         if validated_args.sort:
-             # Convert SortItem models back to dicts for the next function call
-             sort_list = [item.dict() for item in validated_args.sort]
+             # Build the (field, direction) tuples find() wants directly from
+             # the validated models; round-tripping through dicts would just
+             # allocate N throwaway dicts for _process_sort to take apart.
+             sort_list = [(item.field, item.direction) for item in validated_args.sort]
 
         # Call the original function with unpacked arguments
         return self.execute_mongodb_query(
@@ -187,9 +670,55 @@ class MongoToolkit:
             projection=validated_args.projection,
             limit=validated_args.limit,
             skip=validated_args.skip,
-            sort=sort_list # Pass the list of dicts
+            sort=sort_list, # Pass the list of dicts
+            as_json=validated_args.as_json
         )
 
+    @staticmethod
+    def _process_sort(
+        sort: Optional[List[Union[Tuple[str, int], Dict[str, Any]]]]
+    ) -> Optional[List[Tuple[str, int]]]:
+        """Normalizes sort criteria to the (field, direction) tuples find() wants.
+
+        The tool wrappers already pass tuples; {'field', 'direction'} dicts
+        are still accepted for callers using the documented public form.
+        """
+        if not sort:
+            return None
+        # One comprehension plus a C-level any() instead of a per-item
+        # try/except and append loop.
+        try:
+            processed_sort = [
+                (item[0], item[1]) if isinstance(item, (tuple, list))
+                else (item['field'], item['direction'])
+                for item in sort
+            ]
+        except (KeyError, IndexError, TypeError) as e:
+            raise ExecutionError(f"Invalid sort format provided: {sort}. Error: {e}") from e
+        if any(direction not in _VALID_SORT_DIRECTIONS for _, direction in processed_sort):
+            raise ExecutionError(f"Invalid sort format provided: {sort}. Error: sort direction must be {ASCENDING} or {DESCENDING}")
+        return processed_sort
+
+    @staticmethod
+    def _stream_cursor(cursor, max_bytes: Optional[int]) -> Iterator[Dict[str, Any]]:
+        """Yields documents lazily, closing the cursor even on early exit.
+
+        max_bytes is a rough client-side cap (sys.getsizeof per document);
+        the stream ends quietly once the budget is exhausted so a runaway
+        unlimited query can't grow without bound.
+        """
+        total = 0
+        try:
+            for doc in cursor:
+                if max_bytes is not None:
+                    total += sys.getsizeof(doc)
+                    if total > max_bytes:
+                        logger.warning("Result stream exceeded the max_result_mb cap; truncating.")
+                        break
+                yield doc
+        finally:
+            cursor.close()
+
     # (Original execute_mongodb_query function remains the same)
     def execute_mongodb_query(
         self,
@@ -198,100 +727,216 @@ class MongoToolkit:
         projection: Optional[Dict[str, Any]] = None,
         limit: int = 0,
         skip: int = 0,
-        sort: Optional[List[Dict[str, Any]]] = None # Receives list of dicts
-    ) -> List[Dict[str, Any]]:
+        sort: Optional[List[Union[Tuple[str, int], Dict[str, Any]]]] = None,
+        as_json: bool = False,
+        stream: bool = False,
+        batch_size: int = 1000,
+        max_result_mb: Optional[float] = None
+    ) -> Union[List[Dict[str, Any]], str, Iterator[Dict[str, Any]]]:
         # (implementation remains the same - including internal sort processing)
+        if stream and as_json:
+            raise ValidationError("stream=True cannot be combined with as_json=True.")
         db = self._get_db()
+        collection = self._col_cache.get(collection_name)
+        if collection is None:
+            try:
+                collection = self._col_cache.setdefault(collection_name, db[collection_name])
+            except Exception as e:
+                raise ExecutionError(f"Failed to get collection '{collection_name}': {e}") from e
+
+        if as_json:
+            # Serialized output never needs Python dicts; decode straight
+            # from the raw BSON bytes instead.
+            collection = collection.with_options(codec_options=_RAW_CODEC_OPTIONS)
+
+        processed_sort = self._process_sort(sort)
+        # Normalize once up front; the same canonical dict (or None) feeds
+        # both the debug log and the find() call instead of each branch
+        # re-evaluating the projection.
+        normalized_projection = _normalize_projection(projection)
+        if logger.isEnabledFor(logging.DEBUG):
+            # repr() of large filter/projection dicts is itself expensive, so
+            # only format the details when debug logging is actually enabled.
+            logger.debug(
+                "Executing find on %s.%s: filter=%r projection=%r limit=%d skip=%d sort=%r",
+                self.db_name, collection_name, query_filter, normalized_projection, limit, skip, processed_sort,
+            )
+
         try:
-            collection = db[collection_name]
+            # One find() call with everything as kwargs, so pymongo builds the
+            # final find command once instead of mutating the cursor spec
+            # through a sort/skip/limit chain; options left at their defaults
+            # are omitted rather than passed explicitly.
+            find_kwargs: Dict[str, Any] = {}
+            if normalized_projection is not None:
+                find_kwargs["projection"] = normalized_projection
+            if processed_sort:
+                find_kwargs["sort"] = processed_sort
+            if skip:
+                find_kwargs["skip"] = skip
+            if limit:
+                find_kwargs["limit"] = limit
+            cursor = collection.find(query_filter, **find_kwargs)
+            # A batch never needs to exceed what the caller will consume;
+            # sizing it to the limit avoids over-fetching on small queries
+            # while unlimited queries keep steady getMore batches.
+            cursor = cursor.batch_size(min(limit, batch_size) if limit > 0 else batch_size)
+            if stream:
+                # Hand back a lazy iterator: peak memory stays at one server
+                # batch instead of the whole result set, and a caller that
+                # stops early never fetches the rest.
+                max_bytes = int(max_result_mb * 1024 * 1024) if max_result_mb is not None else None
+                return self._stream_cursor(cursor, max_bytes)
+            results = list(cursor)
+            logger.info("Query executed. Found %d documents.", len(results))
+            if as_json:
+                # One C-level Extended JSON dump instead of the caller
+                # repr()-ing thousands of BSON-typed dicts.
+                return json_util.dumps(results)
+            return results
+
+        except OperationFailure as e:
+            msg = f"MongoDB operation failed during query execution: {e}"
+            logger.error(msg)
+            raise ExecutionError(msg) from e
         except Exception as e:
-            raise ExecutionError(f"Failed to get collection '{collection_name}': {e}") from e
+            msg = f"An unexpected error occurred during query execution: {e}"
+            logger.error(msg)
+            raise ExecutionError(msg) from e
 
-        print(f"Executing find on {self.db_name}.{collection_name}")
-        print(f"  Filter: {query_filter}")
-        if projection: print(f"  Projection: {projection}")
-        if limit > 0: print(f"  Limit: {limit}")
-        if skip > 0: print(f"  Skip: {skip}")
 
+    async def _aexecute_query_wrapper(self, **kwargs):
+        """Async twin of _execute_query_wrapper, used as the tool coroutine."""
+        try:
+            validated_args = ExecuteQueryInput.model_validate(kwargs)
+        except Exception as e: # Catch Pydantic validation errors
+             raise ValidationError(f"Invalid input arguments for execute_find_query: {e}") from e
 
-        processed_sort: Optional[List[Tuple[str, int]]] = None
-        if sort:
-            processed_sort = []
-            try:
-                for item in sort:
-                    field = item['field']
-                    direction = item['direction']
-                    if direction not in [ASCENDING, DESCENDING]:
-                        raise ValueError(f"Invalid sort direction {direction}")
-                    processed_sort.append((field, direction))
-                print(f"  Sort: {processed_sort}")
-            except (KeyError, ValueError, TypeError) as e:
-                raise ExecutionError(f"Invalid sort format provided: {sort}. Error: {e}") from e
+        sort_list = None
+        if validated_args.sort:
+             sort_list = [(item.field, item.direction) for item in validated_args.sort]
 
+        return await self.aexecute_mongodb_query(
+            collection_name=validated_args.collection_name,
+            query_filter=validated_args.query_filter,
+            projection=validated_args.projection,
+            limit=validated_args.limit,
+            skip=validated_args.skip,
+            sort=sort_list,
+            as_json=validated_args.as_json
+        )
+
+    async def aexecute_mongodb_query(
+        self,
+        collection_name: str,
+        query_filter: Dict[str, Any],
+        projection: Optional[Dict[str, Any]] = None,
+        limit: int = 0,
+        skip: int = 0,
+        sort: Optional[List[Union[Tuple[str, int], Dict[str, Any]]]] = None,
+        as_json: bool = False
+    ) -> Union[List[Dict[str, Any]], str]:
+        """
+        Async variant of execute_mongodb_query.
+
+        Awaiting the cursor instead of blocking a thread lets an async agent
+        run several tool calls concurrently over the shared client. With
+        as_json=True the results come back as one Extended JSON string, same
+        as the sync path.
+        """
+        db = await self._get_async_db()
         try:
-            cursor = collection.find(query_filter, projection if projection else None)
-            if processed_sort:
-                cursor = cursor.sort(processed_sort)
-            if skip > 0:
-                cursor = cursor.skip(skip)
-            if limit > 0:
-                cursor = cursor.limit(limit)
-            elif limit == 0:
-                 print("  Limit: No limit (0)")
+            collection = db[collection_name]
+        except Exception as e:
+            raise ExecutionError(f"Failed to get collection '{collection_name}': {e}") from e
 
+        if as_json:
+            # Serialized output never needs Python dicts; decode straight
+            # from the raw BSON bytes instead.
+            collection = collection.with_options(codec_options=_RAW_CODEC_OPTIONS)
 
-            results = list(cursor)
-            print(f"Query executed. Found {len(results)} documents.")
+        processed_sort = self._process_sort(sort)
+
+        try:
+            find_kwargs: Dict[str, Any] = {}
+            normalized_projection = _normalize_projection(projection)
+            if normalized_projection is not None:
+                find_kwargs["projection"] = normalized_projection
+            if processed_sort:
+                find_kwargs["sort"] = processed_sort
+            if skip:
+                find_kwargs["skip"] = skip
+            if limit:
+                find_kwargs["limit"] = limit
+            cursor = collection.find(query_filter, **find_kwargs)
+            results = await cursor.to_list(length=limit or None)
+            logger.info("Query executed. Found %d documents.", len(results))
+            if as_json:
+                # One C-level Extended JSON dump instead of the caller
+                # repr()-ing thousands of BSON-typed dicts.
+                return json_util.dumps(results)
             return results
 
         except OperationFailure as e:
             msg = f"MongoDB operation failed during query execution: {e}"
-            print(msg, file=sys.stderr)
+            logger.error(msg)
             raise ExecutionError(msg) from e
         except Exception as e:
             msg = f"An unexpected error occurred during query execution: {e}"
-            print(msg, file=sys.stderr)
+            logger.error(msg)
             raise ExecutionError(msg) from e
 
-
-    @lru_cache(maxsize=1)
     def get_tools(self) -> List[Tool]:
         """
         Returns a list of configured LangChain tools bound to this toolkit instance.
         """
-        print("Generating LangChain tools for MongoToolkit...")
-
-        schema_tool = StructuredTool.from_function(
-            name="get_mongodb_database_schema",
-            description=(
-                f"Use this tool to get the schema of collections within the '{self.db_name}' MongoDB database. "
-                "This is essential for understanding data structure before creating queries. "
-                "ARGUMENTS: "
-                "- target_collection_name (Optional[str]): The specific collection to get the schema for. "
-                "**IMPORTANT: Only provide this if the user explicitly names a collection OR if you are certain based on previous context. If unsure, OMIT this argument to get schemas for ALL collections.** "
-                "- sample_size (int, default=10): Number of documents to sample for inference."
-            ),
+        if self._tools is not None:
+            return self._tools
+        logger.debug("Generating LangChain tools for MongoToolkit...")
+        schema_desc, validate_desc, execute_desc = self._tool_descriptions
+        schema_name, schema_args = _SCHEMA_TOOL_META
+        validate_name, validate_args = _VALIDATE_TOOL_META
+        execute_name, execute_args = _EXECUTE_TOOL_META
+
+        # Direct constructors rather than from_function: every field the
+        # classmethods would infer (name, description, args schema) is
+        # already known, so the signature-inspection pass is skipped.
+        schema_tool = StructuredTool(
+            name=schema_name,
+            description=schema_desc,
             func=self._get_db_schema_wrapper,
-            args_schema=GetSchemaInput
+            args_schema=schema_args
         )
 
-        validate_tool = Tool.from_function(
-            name="validate_mongodb_query_syntax",
-            description="Use this tool to validate the basic syntax of a MongoDB query filter document (dictionary) before execution. Checks for valid operators and structure. Input is the 'query_doc'. Returns 'Syntax is valid.' or lists errors.",
+        validate_tool = Tool(
+            name=validate_name,
+            description=validate_desc,
             func=self.validate_mongodb_query_syntax,
-            args_schema=ValidateSyntaxInput
+            args_schema=validate_args
         )
 
-        execute_tool = StructuredTool.from_function(
-            name="execute_mongodb_find_query",
-            description=(
-                f"Use this tool to execute a MongoDB 'find' query against a specific collection in the '{self.db_name}' database "
-                f"after validating its syntax. Provide arguments like 'collection_name', 'query_filter', etc. "
-                f"By default, results are limited to 10 documents. You can override this by providing a different 'limit' value (use 0 for no limit). "
-                f"Returns a list of matching documents."
-            ),
+        execute_tool = StructuredTool(
+            name=execute_name,
+            description=execute_desc,
             func=self._execute_query_wrapper,
-            args_schema=ExecuteQueryInput
+            coroutine=self._aexecute_query_wrapper,
+            args_schema=execute_args
         )
 
-        return [schema_tool, validate_tool, execute_tool]
\ No newline at end of file
+        self._tools = [schema_tool, validate_tool, execute_tool]
+        return self._tools
+
+def build_default_tools() -> List[Tool]:
+    """Builds the LangChain tools for a toolkit configured from the environment.
+
+    Reads MONGODB_URI and MONGODB_DB_NAME; tool construction stays deferred
+    to this call instead of happening at import time, so importing the
+    package never pays for Pydantic model validation or a connection setup.
+    """
+    mongo_uri = os.environ.get("MONGODB_URI")
+    db_name = os.environ.get("MONGODB_DB_NAME")
+    if not mongo_uri or not db_name:
+        raise ConfigurationError(
+            "MONGODB_URI and MONGODB_DB_NAME environment variables must be set to build default tools."
+        )
+    return MongoToolkit(mongo_uri, db_name).get_tools()
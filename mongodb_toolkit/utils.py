@@ -1,18 +1,26 @@
 import re
 from bson import ObjectId, DBRef, MinKey, MaxKey, Timestamp, Int64, Decimal128, Binary, Code, Regex
-from pymongo import ASCENDING, DESCENDING # Import directly
 from pymongo.collection import Collection
 from pymongo.errors import OperationFailure
 # Use Mapping, Sequence from collections.abc for broader compatibility
 from collections.abc import Mapping, Sequence
-from typing import List, Dict, Any, Set, Optional
+from typing import List, Dict, Any, Optional
+import os
 import sys # For stderr printing
 
 from .exceptions import SchemaError
 
+# Inference inputs are BSON-decoded dicts/lists straight from the driver, so
+# the defensive shape guards in the hot loops can never fire in normal
+# operation. They (and their stderr warnings) only run when this flag is set
+# via MONGODB_TOOLKIT_DEBUG=1, keeping the tight loops to productive work.
+_DEBUG_SCHEMA = os.environ.get("MONGODB_TOOLKIT_DEBUG", "") == "1"
+
 # Constants
 # See: https://www.mongodb.com/docs/manual/reference/operator/query/
-KNOWN_QUERY_OPERATORS = {
+# A frozenset so the table is immutable and every `op in ...` check is one
+# hash probe; nothing can accidentally mutate the operator set at runtime.
+KNOWN_QUERY_OPERATORS = frozenset({
     # Comparison
     '$eq', '$gt', '$gte', '$in', '$lt', '$lte', '$ne', '$nin',
     # Logical
@@ -30,7 +38,7 @@ KNOWN_QUERY_OPERATORS = {
     '$bitsAllClear', '$bitsAllSet', '$bitsAnyClear', '$bitsAnySet',
     # Comments
     '$comment',
-}
+})
 REGEX_TYPES = (re.Pattern, )
 try:
     REGEX_TYPES = (re.Pattern, Regex)
@@ -39,91 +47,178 @@ except ImportError:
 
 # === Schema Inference Helpers ===
 
+# Exact-type dispatch for get_bson_type_name. BSON decoding produces
+# concrete types, so a single type(value) dict probe replaces the dozen-plus
+# isinstance() MRO walks the old chain performed per leaf value. Exact keys
+# also make the bool/int distinction automatic (type(True) is bool), which
+# the isinstance chain only got right through careful ordering.
+_BSON_TYPE_MAP = {
+    str: "string",
+    bool: "bool",
+    Int64: "long",
+    int: "int",
+    float: "double",
+    Decimal128: "decimal",
+    list: "array",
+    tuple: "array",
+    dict: "object",
+    ObjectId: "objectId",
+    DBRef: "dbRef",
+    Timestamp: "timestamp",
+    type(None): "null",
+    MinKey: "minKey",
+    MaxKey: "maxKey",
+    bytes: "binData",
+    bytearray: "binData",
+    Binary: "binData",
+    Code: "javascript",
+    re.Pattern: "regex",
+    Regex: "regex",
+}
+
 def get_bson_type_name(value):
     """Maps Python types to BSON type names for clarity."""
-    if isinstance(value, str): return "string"
+    name = _BSON_TYPE_MAP.get(type(value))
+    if name is not None:
+        return name
+    # Subclasses and exotic values miss the exact-type table; fall back to
+    # the broader ABC checks.
     if isinstance(value, bool): return "bool"
     if isinstance(value, Int64): return "long"
     if isinstance(value, int): return "int"
-    if isinstance(value, float): return "double"
-    if isinstance(value, Decimal128): return "decimal"
-    # Use Sequence check for list-like, exclude str/bytes
+    if isinstance(value, str): return "string"
     if isinstance(value, Sequence) and not isinstance(value, (str, bytes, bytearray)): return "array"
-    if isinstance(value, Mapping): return "object" # Use Mapping check for dict-like
-    if isinstance(value, ObjectId): return "objectId"
-    if isinstance(value, DBRef): return "dbRef"
-    if isinstance(value, Timestamp): return "timestamp"
-    if isinstance(value, type(None)): return "null"
-    if isinstance(value, MinKey): return "minKey"
-    if isinstance(value, MaxKey): return "maxKey"
+    if isinstance(value, Mapping): return "object"
     if isinstance(value, (bytes, Binary)): return "binData"
-    if isinstance(value, Code): return "javascript"
     if isinstance(value, Regex) or isinstance(value, re.Pattern): return "regex"
     # Add other specific BSON types if needed (e.g., datetime)
     return type(value).__name__
 
-def _infer_schema_recursive(obj):
-    """Recursively infers the schema of a Python object (dict, list, or primitive)."""
-    bson_type = get_bson_type_name(obj)
-
-    if bson_type == "object":
-        nested_schema = {}
-        for key, value in obj.items():
-            nested_schema[key] = _infer_schema_recursive(value)
-        return {"types": {bson_type}, "schema": nested_schema}
-
-    elif bson_type == "array":
-        if not obj:
-            return {"types": {bson_type}, "element_schema": {"types": {"empty_array"}}}
-
-        merged_element_schema = None
-        for item in obj:
-            item_schema_info = _infer_schema_recursive(item)
-            # Defensive check for item_schema_info
-            if item_schema_info is None:
-                 print(f"Warning: _infer_schema_recursive returned None for item '{item}' in array. Skipping.", file=sys.stderr)
-                 continue # Skip if inference fails for an item
-
-            if merged_element_schema is None:
-                merged_element_schema = item_schema_info
-            else:
-                merged_element_schema = _merge_schema_info(merged_element_schema, item_schema_info)
-                # Defensive check after merge
-                if merged_element_schema is None:
-                     print(f"Warning: _merge_schema_info returned None while merging array element schemas. Resetting.", file=sys.stderr)
-                     # Decide how to handle: maybe reset to current item_schema_info or skip?
-                     # For now, let's try resetting to the current item's schema to avoid None propagation
-                     merged_element_schema = item_schema_info
-
-
-        # Ensure merged_element_schema is not None before returning
-        if merged_element_schema is None:
-            print(f"Warning: Could not determine merged element schema for array, possibly empty or containing only uninferrable items. Defaulting to unknown.", file=sys.stderr)
-            # Provide a default placeholder if all items failed or list was effectively empty after skips
-            merged_element_schema = {"types": {"unknown_array_element"}}
-
-        return {"types": {bson_type}, "element_schema": merged_element_schema}
-
-    else:
-        # Primitive type
-        return {"types": {bson_type}}
+# Interned leaf schemas: a 1000-doc sample of a 50-field collection would
+# otherwise allocate ~50000 near-identical {"types": {name}} dicts. Cached
+# leaves hold a frozenset so any merge that needs to mutate one is forced
+# through the copy-on-write path in _merge_schema_info first.
+_LEAF_CACHE: Dict[str, Dict[str, Any]] = {}
+
+def _leaf(name):
+    d = _LEAF_CACHE.get(name)
+    if d is None:
+        d = _LEAF_CACHE.setdefault(name, {"types": frozenset((name,))})
+    return d
+
+def _infer_schema_recursive(obj, _get_type=get_bson_type_name):
+    """Infers the schema of a Python object (dict, list, or primitive).
+
+    The walk is iterative with an explicit work stack rather than
+    call-stack recursion: BSON allows 100 nesting levels and a Python
+    frame per level was the largest constant cost of the old
+    implementation.
+    Containers are laid out top-down; array element schemas are then merged
+    children-first (reversed discovery order), which guarantees any array
+    nested inside an element is already resolved when its parent merges.
+
+    get_bson_type_name is bound as a default argument so each of the many
+    calls in this hot traversal resolves it from the fast locals array
+    instead of going through the module-global lookup.
+    """
+    bson_type = _get_type(obj)
+    if bson_type != "object" and bson_type != "array":
+        # Primitive type: shared interned dict, not a fresh allocation.
+        return _leaf(bson_type)
+
+    root = {"types": {bson_type}}
+    # Arrays in discovery order; each entry pairs the array node with the
+    # schema nodes of its elements.
+    pending_arrays = []
+    stack = [(obj, root, bson_type)]
+    while stack:
+        value, node, node_type = stack.pop()
+        if node_type == "object":
+            schema = node["schema"] = {}
+            for key, child in value.items():
+                child_type = _get_type(child)
+                if child_type == "object" or child_type == "array":
+                    child_node = {"types": {child_type}}
+                    stack.append((child, child_node, child_type))
+                else:
+                    child_node = _leaf(child_type)
+                schema[key] = child_node
+        else:  # array
+            elements = []
+            pending_arrays.append((node, elements))
+            for item in value:
+                item_type = _get_type(item)
+                if item_type == "object" or item_type == "array":
+                    item_node = {"types": {item_type}}
+                    stack.append((item, item_node, item_type))
+                else:
+                    item_node = _leaf(item_type)
+                elements.append(item_node)
+
+    for node, elements in reversed(pending_arrays):
+        if not elements:
+            node["element_schema"] = {"types": {"empty_array"}}
+            continue
+        merged_element_schema = elements[0]
+        for item_schema_info in elements[1:]:
+            merged_result = _merge_schema_info(merged_element_schema, item_schema_info)
+            if merged_result is not None:
+                merged_element_schema = merged_result
+        node["element_schema"] = merged_element_schema
+    return root
 
 def _merge_schema_info(existing_info, new_info):
-    """Merges two schema information dictionaries more robustly."""
-    # Handle cases where one input might be invalid/None (shouldn't happen often with checks above)
-    if not isinstance(existing_info, Mapping):
-        print(f"Warning: Invalid 'existing_info' in _merge_schema_info: {existing_info}. Returning 'new_info'.", file=sys.stderr)
-        return new_info if isinstance(new_info, Mapping) else None
-    if not isinstance(new_info, Mapping):
-        print(f"Warning: Invalid 'new_info' in _merge_schema_info: {new_info}. Returning 'existing_info'.", file=sys.stderr)
-        return existing_info # existing_info is known to be a Mapping here
+    """Merges new_info into existing_info in place and returns it.
+
+    existing_info is always a working dict the caller owns (either freshly
+    inferred or already the accumulator entry), so mutating it directly is
+    safe and avoids re-copying every nesting level of every sampled
+    document. The merged dict is still returned so call sites keep their
+    `result is not None` success checks.
+    """
+    # Inputs are always schema dicts built by the inference walk; the shape
+    # guards only run in debug mode.
+    if _DEBUG_SCHEMA:
+        if not isinstance(existing_info, Mapping):
+            print(f"Warning: Invalid 'existing_info' in _merge_schema_info: {existing_info}. Returning 'new_info'.", file=sys.stderr)
+            return new_info if isinstance(new_info, Mapping) else None
+        if not isinstance(new_info, Mapping):
+            print(f"Warning: Invalid 'new_info' in _merge_schema_info: {new_info}. Returning 'existing_info'.", file=sys.stderr)
+            return existing_info # existing_info is known to be a Mapping here
 
     # Now both existing_info and new_info are known to be Mappings
-    merged_info = existing_info.copy()
-
-    # Merge types
-    merged_info["types"] = set(merged_info.get("types", set())) # Ensure it's a set
-    merged_info["types"].update(new_info.get("types", set()))
+    if new_info is existing_info:
+        # Merging a schema with itself (repeated interned leaves, mostly)
+        # is a no-op.
+        return existing_info
+    if "schema" not in new_info and "element_schema" not in new_info:
+        # Leaf-only new_info whose types are already recorded contributes
+        # nothing; skip the promotion/update machinery entirely. This is the
+        # overwhelmingly common merge for fields that keep one type across
+        # the sample.
+        new_types = new_info.get("types")
+        existing_types = existing_info.get("types")
+        if (
+            isinstance(new_types, (set, frozenset))
+            and isinstance(existing_types, (set, frozenset))
+            and new_types <= existing_types
+        ):
+            return existing_info
+    if type(existing_info.get("types")) is frozenset:
+        # existing_info is a shared interned leaf; copy before mutating so
+        # the cache entry stays pristine. Callers assign the return value,
+        # so handing back the copy is safe.
+        existing_info = dict(existing_info)
+    merged_info = existing_info
+
+    # Merge types: reuse the existing set when there is one. The old
+    # set(...) round-trip allocated two sets per merge even when the value
+    # was already a mutable set -- the dominant cost for primitive leaves.
+    types = merged_info.get("types")
+    if not isinstance(types, set):
+        types = set(types) if types else set()
+        merged_info["types"] = types
+    types.update(new_info.get("types", ()))
 
     # Merge nested schemas ('schema' for objects)
     if "schema" in new_info:
@@ -137,10 +232,10 @@ def _merge_schema_info(existing_info, new_info):
                 # Both have valid schemas, merge recursively
                 schema1 = merged_info["schema"] # Known to be Mapping here
                 schema2 = new_nested_schema      # Known to be Mapping here
-                merged_nested = schema1.copy()
+                merged_nested = schema1
                 for key, value2 in schema2.items():
-                    # Ensure value2 is valid before merging
-                    if not isinstance(value2, Mapping):
+                    # Ensure value2 is valid before merging (debug only)
+                    if _DEBUG_SCHEMA and not isinstance(value2, Mapping):
                         print(f"Warning: Invalid value found for key '{key}' in nested schema merge. Skipping.", file=sys.stderr)
                         continue
 
@@ -148,16 +243,14 @@ def _merge_schema_info(existing_info, new_info):
                         merged_nested[key] = value2
                     else:
                         merged_nested_item = merged_nested[key]
-                        # Ensure existing item is valid before merging
-                        if not isinstance(merged_nested_item, Mapping):
+                        # Ensure existing item is valid before merging (debug only)
+                        if _DEBUG_SCHEMA and not isinstance(merged_nested_item, Mapping):
                              print(f"Warning: Overwriting invalid existing schema for key '{key}' during merge.", file=sys.stderr)
                              merged_nested[key] = value2
                         else:
                              merged_result = _merge_schema_info(merged_nested_item, value2)
                              if merged_result is not None: # Only update if merge was successful
                                  merged_nested[key] = merged_result
-                             else:
-                                 print(f"Warning: Recursive merge for key '{key}' failed. Keeping existing.", file=sys.stderr)
 
                 merged_info["schema"] = merged_nested
         else:
@@ -188,15 +281,73 @@ def _merge_schema_info(existing_info, new_info):
 
     return merged_info
 
+def _infer_and_merge_into(obj, target):
+    """Walks a document once, merging each field's schema straight into target.
+
+    Fuses the old infer-then-merge pair: instead of building a full throwaway
+    schema tree for the document and then traversing that tree to merge it,
+    each field is inferred only where target has no entry yet. For nested
+    objects whose fields repeat across the sample (the common case), the walk
+    descends directly into the existing nested schema dict.
+    """
+    for key, value in obj.items():
+        existing = target.get(key)
+        if existing is None:
+            target[key] = _infer_schema_recursive(value)
+        elif (
+            type(value) is dict
+            and isinstance(existing.get("schema"), Mapping)
+            and isinstance(existing.get("types"), set)
+        ):
+            # Object seen under this key before: no intermediate tree, just
+            # record the type and recurse into the existing nested schema.
+            existing["types"].add("object")
+            _infer_and_merge_into(value, existing["schema"])
+        else:
+            merged_result = _merge_schema_info(existing, _infer_schema_recursive(value))
+            if merged_result is not None:
+                target[key] = merged_result
+
+
 # (generate_collection_schema remains mostly the same, but benefits from robust merge)
-def generate_collection_schema(collection: Collection, sample_size: int) -> Optional[Dict[str, Any]]:
-    """Infers the schema of a single MongoDB collection by sampling documents."""
+def generate_collection_schema(collection: Collection, sample_size: int, projection: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
+    """Infers the schema of a single MongoDB collection by sampling documents.
+
+    When a projection is given it is pushed down to the server, so only the
+    fields the caller cares about are returned and decoded; inference then
+    describes just those fields.
+    """
     print(f"  Sampling up to {sample_size} documents from '{collection.name}'...")
+    merged_collection_schema = {}
+    doc_count = 0
     try:
-        documents = list(collection.find(limit=sample_size))
-        if not documents:
-            print("  Collection is empty or no documents found in sample.")
-            return None
+        # Stream the cursor instead of materializing every sampled document
+        # into a list first: the merge is online (one doc at a time), so
+        # peak memory stays at one server batch regardless of sample_size.
+        # $sample draws documents randomly server-side, so the schema is not
+        # biased toward the oldest documents in natural order; the comment
+        # tags the operation for DB-side profiling.
+        try:
+            pipeline: List[Dict[str, Any]] = [{"$sample": {"size": sample_size}}]
+            if projection:
+                pipeline.append({"$project": projection})
+            cursor = collection.aggregate(pipeline, batchSize=200, comment="schema-inference")
+        except OperationFailure:
+            # Some views and older servers reject $sample; the natural-order
+            # prefix is still better than no schema at all.
+            print(f"  $sample unavailable for '{collection.name}'; falling back to natural-order sampling.")
+            cursor = collection.find(projection=projection, limit=sample_size).batch_size(200)
+        for doc in cursor:
+            doc_count += 1
+            # The top level is always an object for a MongoDB doc; the fused
+            # walk merges it straight into the accumulator without building a
+            # throwaway per-document schema tree first. The driver already
+            # guarantees a decoded dict, so the shape guard (and the old
+            # per-document exception swallowing) only runs in debug mode.
+            if _DEBUG_SCHEMA and not isinstance(doc, Mapping):
+                print(f"Warning: Sampled value is not a document: {type(doc).__name__}. Skipping.", file=sys.stderr)
+                continue
+            _infer_and_merge_into(doc, merged_collection_schema)
     # (error handling remains the same)
     except OperationFailure as e:
         print(f"  Error sampling collection '{collection.name}': {e}")
@@ -205,141 +356,145 @@ def generate_collection_schema(collection: Collection, sample_size: int) -> Opti
         print(f"  Unexpected error accessing collection '{collection.name}': {e}")
         raise SchemaError(f"Unexpected error sampling {collection.name}: {e}") from e
 
-    merged_collection_schema = {}
-    doc_count = 0
-    for doc in documents:
-        doc_count += 1
-        try:
-            doc_schema_info = _infer_schema_recursive(doc)
+    if doc_count == 0:
+        print("  Collection is empty or no documents found in sample.")
+        return None
+    print(f"  Analyzed {doc_count} documents.")
+    return merged_collection_schema
 
-            # Defensive check: Ensure inference returned a dict
-            if not isinstance(doc_schema_info, Mapping):
-                print(f"Warning: Schema inference for document (ID: {doc.get('_id', 'N/A')}) failed, returned non-dict. Skipping doc.", file=sys.stderr)
-                continue
 
-            # The top level is always an object for a MongoDB doc
-            if "schema" in doc_schema_info and isinstance(doc_schema_info["schema"], Mapping):
-                doc_inner_schema = doc_schema_info["schema"]
-                temp_merged = merged_collection_schema.copy()
+# === Syntax Validation Helpers ===
 
-                for key, value_info in doc_inner_schema.items():
-                    # Defensive check: Ensure value_info is a dict
-                    if not isinstance(value_info, Mapping):
-                        print(f"Warning: Invalid schema info for key '{key}' in document (ID: {doc.get('_id', 'N/A')}). Skipping key.", file=sys.stderr)
-                        continue
+# Query filters arrive as parsed JSON, so values are almost always plain
+# dicts/lists. These helpers answer the common case with a concrete
+# type() check (one pointer comparison) and only fall back to the much
+# slower ABC isinstance machinery for exotic mapping/sequence subclasses.
 
-                    existing_value_info = temp_merged.get(key)
-                    if existing_value_info is None:
-                        temp_merged[key] = value_info
-                    elif not isinstance(existing_value_info, Mapping):
-                         print(f"Warning: Overwriting previously invalid schema for key '{key}' with new info.", file=sys.stderr)
-                         temp_merged[key] = value_info
-                    else:
-                        # Both existing and new are valid Mappings, merge them
-                        merged_result = _merge_schema_info(existing_value_info, value_info)
-                        if merged_result is not None: # Only update if merge successful
-                            temp_merged[key] = merged_result
-                        else:
-                             print(f"Warning: Merge failed for key '{key}'. Keeping previous merged state.", file=sys.stderr)
+def _is_mapping(value):
+    return type(value) is dict or isinstance(value, Mapping)
 
-                merged_collection_schema = temp_merged
-            elif "schema" not in doc_schema_info:
-                 print(f"Warning: Inference for document (ID: {doc.get('_id', 'N/A')}) did not produce a 'schema' key, though type was object. Skipping doc.", file=sys.stderr)
-            else: # schema exists but is not a Mapping
-                print(f"Warning: Inference for document (ID: {doc.get('_id', 'N/A')}) produced a non-dictionary 'schema'. Skipping doc.", file=sys.stderr)
+def _is_array(value):
+    t = type(value)
+    if t is list or t is tuple:
+        return True
+    return isinstance(value, Sequence) and not isinstance(value, (str, bytes))
 
-        except Exception as e:
-             # Catch errors during processing of a single document
-             print(f"Error processing schema for document (ID: {doc.get('_id', 'N/A')}): {e}. Skipping doc.", file=sys.stderr)
-             # Optionally log the traceback here for deeper debugging
-             # import traceback; traceback.print_exc()
+# Per-operator structural checks. Dispatching through this table costs one
+# dict lookup per operator instead of walking an if/elif chain inside the
+# recursion; every handler takes (op, value, errors, path).
 
-    print(f"  Analyzed {doc_count} documents.")
-    return merged_collection_schema
+def _check_logical_list(op, value, errors, path):
+    if not _is_array(value):
+        errors.append(f"Invalid value type for operator '{op}' at '{path}': Expected an array of query documents.")
+    else:
+        # An empty array is syntactically valid; the loop just does nothing.
+        for i, sub_doc in enumerate(value):
+            validate_query_syntax_recursive(sub_doc, errors, path_prefix=f"{path}[{i}]")
+
+def _check_not(op, value, errors, path):
+    if not _is_mapping(value) and not isinstance(value, REGEX_TYPES):
+        errors.append(f"Invalid value type for operator '{op}' at '{path}': Expected an operator expression block (dictionary) or a regex pattern.")
+    elif _is_mapping(value):
+        validate_query_syntax_recursive(value, errors, path_prefix=path)
+
+def _check_array_value(op, value, errors, path):
+    if not _is_array(value):
+        errors.append(f"Invalid value type for operator '{op}' at '{path}': Expected an array.")
+
+def _check_elem_match(op, value, errors, path):
+    if not _is_mapping(value):
+        errors.append(f"Invalid value type for operator '{op}' at '{path}': Expected a query document (dictionary).")
+    else:
+        validate_query_syntax_recursive(value, errors, path_prefix=path)
+
+def _check_exists(op, value, errors, path):
+    if not isinstance(value, bool):
+        errors.append(f"Invalid value type for operator '{op}' at '{path}': Expected a boolean (true/false).")
+
+def _check_type(op, value, errors, path):
+    is_valid_type = False
+    if isinstance(value, (str, int)): is_valid_type = True
+    elif _is_array(value):
+        is_valid_type = all(isinstance(item, (str, int)) for item in value)
+    if not is_valid_type:
+        errors.append(f"Invalid value type for operator '{op}' at '{path}': Expected a BSON type string, number, or an array of strings/numbers.")
+
+def _check_size(op, value, errors, path):
+    if not isinstance(value, int):
+        errors.append(f"Invalid value type for operator '{op}' at '{path}': Expected an integer.")
+
+def _check_regex(op, value, errors, path):
+    if not isinstance(value, (str, ) + REGEX_TYPES):
+        errors.append(f"Invalid value type for operator '{op}' at '{path}': Expected a string or regex pattern.")
+
+def _check_mod(op, value, errors, path):
+    if not _is_array(value) or len(value) != 2 or not all(isinstance(v, (int, float)) for v in value):
+        errors.append(f"Invalid value type for operator '{op}' at '{path}': Expected an array of two numbers [divisor, remainder].")
+
+# Operators without an entry here have no structural requirements to check.
+_OP_HANDLERS = {
+    '$and': _check_logical_list,
+    '$or': _check_logical_list,
+    '$nor': _check_logical_list,
+    '$not': _check_not,
+    '$in': _check_array_value,
+    '$nin': _check_array_value,
+    '$all': _check_array_value,
+    '$elemMatch': _check_elem_match,
+    '$exists': _check_exists,
+    '$type': _check_type,
+    '$size': _check_size,
+    '$regex': _check_regex,
+    '$mod': _check_mod,
+}
 
 
-# === Syntax Validation Helpers ===
 def validate_query_syntax_recursive(current_part, errors, path_prefix):
     """Recursive helper for syntax validation."""
-    if not isinstance(current_part, Mapping):
+    if not _is_mapping(current_part):
         errors.append(f"Invalid structure at '{path_prefix}': Expected a dictionary, but found {type(current_part).__name__}.")
         return
 
+    # The node path is only read when an error is recorded or the walk
+    # descends, so it is built inside those branches. For the common case --
+    # a known operator with no structural handler, or a field with a scalar
+    # value -- no path string is allocated at all.
     for key, value in current_part.items():
-        current_path = f"{path_prefix}.{key}" if path_prefix else key
-
-        # Check 1: Key is an Operator
-        if key.startswith('$'):
+        # Check 1: Key is an Operator. The slice compare is cheaper than a
+        # startswith() method call for a one-character prefix, and this is
+        # the hottest predicate in the validator.
+        if key[:1] == '$':
             if key not in KNOWN_QUERY_OPERATORS:
+                current_path = f"{path_prefix}.{key}" if path_prefix else key
                 errors.append(f"Unknown operator '{key}' used at '{current_path}'.")
                 continue # Don't validate value structure for unknown ops
 
             # Check structural type of the value based on the operator
-            if key in ('$and', '$or', '$nor'):
-                if not isinstance(value, Sequence) or isinstance(value, (str, bytes)):
-                    errors.append(f"Invalid value type for operator '{key}' at '{current_path}': Expected an array of query documents.")
-                elif not value:
-                     # It's syntactically valid, maybe add a warning if desired
-                     # errors.append(f"Warning: Operator '{key}' at '{current_path}' has an empty array.")
-                     pass
-                else:
-                    for i, sub_doc in enumerate(value):
-                        validate_query_syntax_recursive(sub_doc, errors, path_prefix=f"{current_path}[{i}]")
-
-            elif key == '$not':
-                if not isinstance(value, Mapping) and not isinstance(value, REGEX_TYPES):
-                     errors.append(f"Invalid value type for operator '{key}' at '{current_path}': Expected an operator expression block (dictionary) or a regex pattern.")
-                elif isinstance(value, Mapping):
-                     validate_query_syntax_recursive(value, errors, path_prefix=current_path)
-
-            elif key in ('$in', '$nin', '$all'):
-                 if not isinstance(value, Sequence) or isinstance(value, (str, bytes)):
-                    errors.append(f"Invalid value type for operator '{key}' at '{current_path}': Expected an array.")
-
-            elif key == '$elemMatch':
-                if not isinstance(value, Mapping):
-                    errors.append(f"Invalid value type for operator '{key}' at '{current_path}': Expected a query document (dictionary).")
-                else:
-                     validate_query_syntax_recursive(value, errors, path_prefix=current_path)
-
-            elif key == '$exists':
-                 if not isinstance(value, bool):
-                     errors.append(f"Invalid value type for operator '{key}' at '{current_path}': Expected a boolean (true/false).")
-
-            elif key == '$type':
-                is_valid_type = False
-                if isinstance(value, (str, int)): is_valid_type = True
-                elif isinstance(value, Sequence) and not isinstance(value, (str, bytes)):
-                    is_valid_type = all(isinstance(item, (str, int)) for item in value)
-                if not is_valid_type:
-                     errors.append(f"Invalid value type for operator '{key}' at '{current_path}': Expected a BSON type string, number, or an array of strings/numbers.")
-
-            elif key == '$size':
-                 if not isinstance(value, int):
-                     errors.append(f"Invalid value type for operator '{key}' at '{current_path}': Expected an integer.")
-
-            elif key == '$regex':
-                 if not isinstance(value, (str, ) + REGEX_TYPES):
-                      errors.append(f"Invalid value type for operator '{key}' at '{current_path}': Expected a string or regex pattern.")
-
-            elif key == '$mod':
-                 if not isinstance(value, Sequence) or isinstance(value, (str, bytes)) or len(value) != 2 or not all(isinstance(v, (int, float)) for v in value):
-                     errors.append(f"Invalid value type for operator '{key}' at '{current_path}': Expected an array of two numbers [divisor, remainder].")
-
-            # Add more structural checks if needed
+            handler = _OP_HANDLERS.get(key)
+            if handler is not None:
+                current_path = f"{path_prefix}.{key}" if path_prefix else key
+                handler(key, value, errors, current_path)
 
         # Check 2: Key is a Field Name
         else:
             if not key: errors.append(f"Empty field name found at '{path_prefix}'.")
-            elif key.startswith('$'): errors.append(f"Invalid field name '{key}' starting with '$' at '{current_path}'.")
-            elif isinstance(value, Mapping):
-                sub_keys = list(value.keys())
-                has_operators = any(k.startswith('$') for k in sub_keys)
-                has_fields = any(not k.startswith('$') for k in sub_keys)
+            elif _is_mapping(value):
+                # One pass over the keys (no materialized list, no double
+                # scan), breaking as soon as both kinds have been seen.
+                has_operators = has_fields = False
+                for k in value:
+                    if k[:1] == '$':
+                        has_operators = True
+                    else:
+                        has_fields = True
+                    if has_operators and has_fields:
+                        break
 
                 if has_operators and has_fields:
+                    current_path = f"{path_prefix}.{key}" if path_prefix else key
                     errors.append(f"Invalid query structure at '{current_path}': Cannot mix operators and field names at the same level within a field's value.")
                 # Recursively validate if it's purely operators or purely fields
                 elif has_operators or has_fields:
+                    current_path = f"{path_prefix}.{key}" if path_prefix else key
                     validate_query_syntax_recursive(value, errors, path_prefix=current_path)
                 # Empty dict {} is fine
\ No newline at end of file
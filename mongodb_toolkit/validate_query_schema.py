@@ -1,35 +1,78 @@
 import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
 from bson import ObjectId, DBRef, MinKey, MaxKey, Timestamp, Int64, Decimal128, Binary, Code, Regex
 from collections.abc import Mapping, Sequence # Use abc for broader type checks
 
-def get_value_type_name(value):
+# Exact-type dispatch table, seeded with the types queries are built from.
+# get_value_type_name probes this before falling back to the isinstance
+# cascade, so the common case is one dict lookup instead of ~13 checks.
+# The slow path caches by concrete type, so the cascade runs once per class
+# encountered (bounded in practice by the number of distinct value types).
+_TYPE_NAME_CACHE = {
+    str: "string",
+    bool: "bool",
+    Int64: "long", # Important: Int64 is an int subclass, exact-type keys keep them distinct
+    int: "int", # Could be Int32 or Int64 in BSON
+    float: "double",
+    Decimal128: "decimal",
+    list: "array",
+    tuple: "array",
+    dict: "object",
+    ObjectId: "objectId",
+    DBRef: "dbRef",
+    Timestamp: "timestamp",
+    type(None): "null",
+    MinKey: "minKey",
+    MaxKey: "maxKey",
+    bytes: "binData", # Treat bytes as binData
+    Binary: "binData",
+    Code: "javascript",
+    re.Pattern: "regex",
+    Regex: "regex",
+}
+
+def get_value_type_name(value: Any) -> str:
     """Maps Python types commonly found in queries to BSON type names."""
-    if isinstance(value, str): return "string"
-    if isinstance(value, bool): return "bool"
+    name = _TYPE_NAME_CACHE.get(type(value))
+    if name is not None:
+        return name
+    return _slow_value_type_name(value)
+
+def _slow_value_type_name(value: Any) -> str:
+    """Full isinstance cascade for subclasses and other dict/list-likes."""
+    t = type(value)
+    if isinstance(value, str): name = "string"
+    elif isinstance(value, bool): name = "bool"
     # Important: Check Int64 before int if you might have large numbers
-    if isinstance(value, Int64): return "long"
-    if isinstance(value, int): return "int" # Could be Int32 or Int64 in BSON
-    if isinstance(value, float): return "double"
-    if isinstance(value, Decimal128): return "decimal"
+    elif isinstance(value, Int64): name = "long"
+    elif isinstance(value, int): name = "int"
+    elif isinstance(value, float): name = "double"
+    elif isinstance(value, Decimal128): name = "decimal"
     # Check Sequence *before* Mapping/dict, but exclude str/bytes
-    if isinstance(value, Sequence) and not isinstance(value, (str, bytes, bytearray)): return "array"
-    if isinstance(value, Mapping): return "object" # Check Mapping for dict-like
-    if isinstance(value, ObjectId): return "objectId"
-    if isinstance(value, DBRef): return "dbRef"
-    if isinstance(value, Timestamp): return "timestamp"
-    if isinstance(value, type(None)): return "null"
-    if isinstance(value, MinKey): return "minKey"
-    if isinstance(value, MaxKey): return "maxKey"
-    if isinstance(value, (bytes, Binary)): return "binData" # Treat bytes as binData
-    if isinstance(value, Code): return "javascript"
+    elif isinstance(value, Sequence) and not isinstance(value, _SEQ_NON_STR): name = "array"
+    elif isinstance(value, Mapping): name = "object" # Check Mapping for dict-like
+    elif isinstance(value, ObjectId): name = "objectId"
+    elif isinstance(value, DBRef): name = "dbRef"
+    elif isinstance(value, Timestamp): name = "timestamp"
+    elif isinstance(value, MinKey): name = "minKey"
+    elif isinstance(value, MaxKey): name = "maxKey"
+    elif isinstance(value, (bytes, Binary)): name = "binData"
+    elif isinstance(value, Code): name = "javascript"
     # isinstance(value, Regex) doesn't work directly for re.Pattern
-    if isinstance(value, Regex) or hasattr(value, 'pattern'): return "regex"
-    # Add datetime, etc. if needed
-    # Fallback
-    return type(value).__name__
+    elif isinstance(value, Regex) or hasattr(value, 'pattern'):
+        # The hasattr probe is instance-dependent, so don't cache by type.
+        return "regex"
+    else:
+        # Add datetime, etc. if needed
+        # Fallback
+        name = t.__name__
+    _TYPE_NAME_CACHE[t] = name
+    return name
 
 # List of common MongoDB query operators (add more if needed)
-QUERY_OPERATORS = {
+QUERY_OPERATORS = frozenset({
     '$eq', '$ne', '$gt', '$gte', '$lt', '$lte', '$in', '$nin',
     '$exists', '$type',
     '$mod', '$regex', '$options', '$text', '$search', '$where',
@@ -38,46 +81,626 @@ QUERY_OPERATORS = {
     # Logical operators
     '$and', '$or', '$not', '$nor',
     # Geospatial, Bitwise, etc. can be added here
-}
+})
+
+# Hoisted per-call constants: these were rebuilt inside the validation loop
+# on every operator, $in item and direct match. Frozensets also hash-probe
+# slightly faster than freshly-built sets.
+_NUMERIC_TYPES = frozenset(('int', 'long', 'double', 'decimal'))
+_LOGICAL_OPS = frozenset(('$and', '$or', '$nor'))
+_SEQ_NON_STR = (str, bytes, bytearray) # Sequence types that are not query arrays
+
+# Type names encoded as single-bit integers so membership and the numeric
+# interchange test become bitwise AND instead of set hashing. Unknown names
+# (schemas can carry inference fallbacks like 'bytearray') get bits assigned
+# on first sight.
+_BSON_TYPE_BITS: Dict[str, int] = {}
+for _name in ('string', 'bool', 'int', 'long', 'double', 'decimal', 'array',
+              'object', 'objectId', 'dbRef', 'timestamp', 'null', 'minKey',
+              'maxKey', 'binData', 'javascript', 'regex', 'empty_array'):
+    _BSON_TYPE_BITS[_name] = 1 << len(_BSON_TYPE_BITS)
+
+
+def _type_bit(name: str) -> int:
+    bit = _BSON_TYPE_BITS.get(name)
+    if bit is None:
+        bit = 1 << len(_BSON_TYPE_BITS)
+        _BSON_TYPE_BITS[name] = bit
+    return bit
+
+
+_NUMERIC_MASK = (_BSON_TYPE_BITS['int'] | _BSON_TYPE_BITS['long']
+                 | _BSON_TYPE_BITS['double'] | _BSON_TYPE_BITS['decimal'])
+
+# Exact-type -> bit fast path, seeded from the name table; maintained by
+# get_value_type_bit under the same caching rule as _TYPE_NAME_CACHE.
+_TYPE_BIT_CACHE = {t: _type_bit(n) for t, n in _TYPE_NAME_CACHE.items()}
+
+
+def get_value_type_bit(value: Any) -> int:
+    """Returns the type bit for a query value; bitmask twin of
+    get_value_type_name."""
+    bit = _TYPE_BIT_CACHE.get(type(value))
+    if bit is not None:
+        return bit
+    bit = _type_bit(get_value_type_name(value))
+    if type(value) in _TYPE_NAME_CACHE:
+        # Same cacheability rule as the name lookup (skips the
+        # instance-dependent regex case).
+        _TYPE_BIT_CACHE[type(value)] = bit
+    return bit
+
+
+def _bits_to_names(mask: int) -> List[str]:
+    """Decodes a bitmask back to sorted type names for error messages."""
+    return sorted(name for name, bit in _BSON_TYPE_BITS.items() if bit & mask)
+
+
+def _is_mapping(value: Any) -> bool:
+    """isinstance(value, Mapping), with a fast path for plain dicts."""
+    return type(value) is dict or isinstance(value, Mapping)
+
+
+def _is_array(value: Any) -> bool:
+    """True for values that count as query arrays, with fast paths for
+    list/tuple; the abc Sequence check only runs for exotic types."""
+    t = type(value)
+    if t is list or t is tuple:
+        return True
+    return isinstance(value, Sequence) and not isinstance(value, _SEQ_NON_STR)
+
+
+# Schema Compilation
+
+class FieldInfo:
+    """Compiled, attribute-access form of one schema entry.
+
+    Slotted attributes replace the dict lookups (``.get('types', set())``
+    and friends) the validator used to perform per query value; the
+    membership flags are computed once at compile time.
+    """
+    __slots__ = ('types', 'types_mask', 'element_schema', 'sub_schema',
+                 'has_numeric', 'allows_null', 'is_object', 'is_array')
+
+    def __init__(self, raw_info: Dict[str, Any]) -> None:
+        types = raw_info.get('types')
+        self.types = frozenset(types) if types else frozenset()
+        mask = 0
+        for t in self.types:
+            mask |= _type_bit(t)
+        self.types_mask = mask
+        self.has_numeric = not self.types.isdisjoint(_NUMERIC_TYPES)
+        self.allows_null = 'null' in self.types
+        self.is_object = 'object' in self.types
+        self.is_array = 'array' in self.types
+        raw_elem = raw_info.get('element_schema')
+        self.element_schema = FieldInfo(raw_elem) if raw_elem and _is_mapping(raw_elem) else None
+        sub = raw_info.get('schema')
+        # Raw nested object schema; compiled on demand via CompiledSchema.sub_schema.
+        self.sub_schema = sub if _is_mapping(sub) else None
+
+
+class CompiledSchema:
+    """A flattened, lookup-optimized form of an expected schema.
+
+    ``paths`` maps dotted field paths (e.g. "address.city") directly to the
+    field info dict from the raw schema, so validation does a single dict
+    lookup per query key instead of splitting the key and walking the nested
+    schema tree on every call. The raw schema is kept on ``raw`` for the
+    slow-path traversal (needed to produce precise errors on unknown paths).
+    """
+    __slots__ = ("raw", "paths", "_subs")
+
+    def __init__(self, raw_schema: Dict[str, Any]) -> None:
+        self.raw = raw_schema
+        self.paths = {}
+        self._subs = {}
+        _flatten_schema_into(raw_schema, "", self.paths)
+
+    def sub_schema(self, raw_sub_schema: Dict[str, Any]) -> "CompiledSchema":
+        """Returns a compiled view of a nested object schema, memoized so
+        repeated $elemMatch validation against the same element schema does
+        not recompile it."""
+        cache_key = id(raw_sub_schema)
+        compiled = self._subs.get(cache_key)
+        if compiled is None:
+            compiled = CompiledSchema(raw_sub_schema)
+            self._subs[cache_key] = compiled
+        return compiled
+
+
+def _flatten_schema_into(schema_part: Dict[str, Any], prefix: str, paths: Dict[str, FieldInfo]) -> None:
+    """Recursively flattens a nested schema dict into dotted-path entries."""
+    for field, info in schema_part.items():
+        if not _is_mapping(info):
+            continue
+        path = prefix + field
+        paths[path] = FieldInfo(info)
+        # Only descend through well-formed object fields; malformed entries
+        # are left out so the slow path can report the precise problem.
+        if 'object' in info.get('types', ()):
+            nested = info.get('schema')
+            if _is_mapping(nested):
+                _flatten_schema_into(nested, path + '.', paths)
+
+
+def compile_schema(expected_schema: Dict[str, Any]) -> CompiledSchema:
+    """Precompiles an expected schema for repeated validation calls.
+
+    Pass the returned CompiledSchema to validate_query to skip recompilation.
+    """
+    return CompiledSchema(expected_schema)
+
+
+# Per-thread pooled ErrorCollector: services validating many queries reuse
+# one collector (and its backing list) per thread instead of allocating a
+# fresh list per call; validate_query copies the items out before returning
+# so callers never hold the pooled buffer.
+_TLS = threading.local()
+
+
+class _StopValidation(Exception):
+    """Raised internally when the error limit is exhausted."""
+
+
+class ErrorCollector:
+    """List-compatible error sink that stops validation at a limit.
+
+    Exposes ``append`` so handlers don't care whether they write to a plain
+    list (unlimited mode) or a capped collector; once ``limit`` messages
+    have been recorded a truncation marker is added and _StopValidation
+    unwinds the driver loop.
+    """
+    __slots__ = ('items', 'limit', 'stopped')
+
+    def __init__(self, limit: int) -> None:
+        self.items: List[str] = []
+        self.limit = limit
+        self.stopped = False
+
+    def reset(self, limit: int) -> None:
+        self.items.clear()
+        self.limit = limit
+        self.stopped = False
+
+    def append(self, msg: str) -> None:
+        if len(self.items) < self.limit:
+            self.items.append(msg)
+            return
+        if not self.stopped:
+            self.stopped = True
+            self.items.append(f"... (error limit of {self.limit} reached, validation truncated)")
+        raise _StopValidation()
+
+
+# Validation-result cache for precompiled schemas.
+#
+# Servers tend to reuse the same filter shape (same fields and operators,
+# different literals) many times. The validator's output depends only on the
+# key/operator topology, the BSON type of each literal (plus the literal
+# itself for $type), and the schema — so a signature over those determines
+# the exact error list. Cached only when the caller passes a CompiledSchema,
+# keyed by (signature, compiled instance); the compiled schema must not be
+# mutated after compilation.
+_RESULT_CACHE = {}
+_RESULT_CACHE_MAX = 1024
+_SIG_MAX_DEPTH = 50
+
+
+def _structure_sig(obj: Any, _key: Optional[str] = None, _depth: int = 0) -> Optional[Any]:
+    """Builds a hashable signature of a query's shape and value types.
+
+    Returns None when the query contains non-concrete containers or is
+    nested too deeply, in which case caching is skipped for safety.
+    """
+    if _depth > _SIG_MAX_DEPTH:
+        return None
+    t = type(obj)
+    if t is dict:
+        items = []
+        for k, v in obj.items():
+            if type(k) is not str:
+                return None
+            sub = _structure_sig(v, k, _depth + 1)
+            if sub is None:
+                return None
+            items.append((k, sub))
+        return ('{}', tuple(items))
+    if t is list or t is tuple:
+        items = []
+        for x in obj:
+            sub = _structure_sig(x, None, _depth + 1)
+            if sub is None:
+                return None
+            items.append(sub)
+        return ('[]', tuple(items))
+    if _key == '$type':
+        # $type errors quote the literal itself, so it must be in the key.
+        return ('$type', obj) if isinstance(obj, (str, int)) else None
+    name = get_value_type_name(obj)
+    if name == 'object' or name == 'array':
+        # Mapping/Sequence subclasses the validator would descend into;
+        # don't risk a stale cached result.
+        return None
+    return name
 
 
 # Validation Logic
 
-def validate_query(query_doc, expected_schema):
+def _coerce_schema(expected_schema: Union[Dict[str, Any], CompiledSchema]) -> Optional[CompiledSchema]:
+    if isinstance(expected_schema, CompiledSchema):
+        return expected_schema
+    if _is_mapping(expected_schema):
+        return CompiledSchema(expected_schema)
+    return None
+
+
+def _run_validation(query_doc: Dict[str, Any], compiled: CompiledSchema, errors: Any) -> None:
+    """Runs the work-stack driver loop, honoring the error cap."""
+    stack = [(query_doc, compiled, "")]
+    try:
+        while stack:
+            query_part, part_schema, path_prefix = stack.pop()
+            _validate_one_level(query_part, part_schema, path_prefix, errors, stack, full_schema=compiled)
+    except _StopValidation:
+        pass
+
+
+def validate_query(query_doc: Dict[str, Any], expected_schema: Union[Dict[str, Any], CompiledSchema], max_errors: Optional[int] = 100) -> List[str]:
     """
     Validates a MongoDB query document against an expected schema definition.
 
     Args:
         query_doc (dict): The MongoDB query filter document.
-        expected_schema (dict): The schema definition (output similar to the inference script).
+        expected_schema (dict or CompiledSchema): The schema definition
+            (output similar to the inference script), either raw or
+            precompiled via compile_schema().
+        max_errors (int, optional): Stop validating once this many errors
+            have been collected (a truncation marker is appended). Pass
+            None for unlimited. Defaults to 100.
 
     Returns:
         list: A list of strings describing validation errors. An empty list means valid.
     """
-    if not isinstance(query_doc, Mapping):
+    if not _is_mapping(query_doc):
         return ["Query document must be a dictionary-like object."]
-    if not isinstance(expected_schema, Mapping):
-         return ["Expected schema must be a dictionary-like object."]
+    compiled = _coerce_schema(expected_schema)
+    if compiled is None:
+        return ["Expected schema must be a dictionary-like object."]
+
+    # Full short-circuit for repeated filter shapes against a precompiled
+    # schema: identical signature + schema means an identical error list.
+    sig = _structure_sig(query_doc) if compiled is expected_schema else None
+    if sig is not None:
+        cached = _RESULT_CACHE.get((sig, compiled, max_errors))
+        if cached is not None:
+            return list(cached)
+
+    if max_errors is None:
+        errors = []
+    else:
+        errors = getattr(_TLS, 'collector', None)
+        if errors is None:
+            errors = _TLS.collector = ErrorCollector(max_errors)
+        else:
+            errors.reset(max_errors)
 
-    errors = []
-    _validate_recursive(query_doc, expected_schema, errors, path_prefix="", full_schema=expected_schema)
+    _run_validation(query_doc, compiled, errors)
+
+    if type(errors) is ErrorCollector:
+        # Shallow copy: the collector and its list are reused next call.
+        errors = list(errors.items)
+    if sig is not None:
+        if len(_RESULT_CACHE) >= _RESULT_CACHE_MAX:
+            _RESULT_CACHE.clear()
+        _RESULT_CACHE[(sig, compiled, max_errors)] = tuple(errors)
     return errors
 
-def _validate_recursive(query_part, schema_part, errors, path_prefix, full_schema):
-    """Recursive helper for validation."""
 
-    if not isinstance(query_part, Mapping):
+@lru_cache(maxsize=4096)
+def _split_path(key: str) -> Tuple[str, ...]:
+    """Splits a dotted field path into a shared, cached tuple of parts.
+
+    Applications tend to reuse the same filter shapes, so the same dotted
+    keys recur; caching turns the split plus list allocation into a dict
+    lookup. Only the slow-path resolver needs this — keys already in the
+    compiled flat table are never split at all.
+    """
+    return tuple(key.split('.'))
+
+
+def validate_query_into(query_doc: Dict[str, Any], expected_schema: Union[Dict[str, Any], CompiledSchema], out: List[str], max_errors: Optional[int] = 100) -> List[str]:
+    """Variant of validate_query that appends errors to a caller-supplied
+    list instead of allocating a result, for high-throughput loops.
+
+    With max_errors=None errors are written straight into ``out`` with no
+    intermediate allocation; with a cap, a local collector enforces the
+    limit and its items are copied into ``out``. Bypasses the result
+    cache. Returns ``out``.
+    """
+    if not _is_mapping(query_doc):
+        out.append("Query document must be a dictionary-like object.")
+        return out
+    compiled = _coerce_schema(expected_schema)
+    if compiled is None:
+        out.append("Expected schema must be a dictionary-like object.")
+        return out
+
+    if max_errors is None:
+        _run_validation(query_doc, compiled, out)
+    else:
+        collector = ErrorCollector(max_errors)
+        _run_validation(query_doc, compiled, collector)
+        out.extend(collector.items)
+    return out
+
+
+def _resolve_field_info(key: str, compiled: CompiledSchema, errors: Any, path_prefix: str, current_path: str) -> Optional[FieldInfo]:
+    """Slow-path resolution of a query key against the raw schema tree.
+
+    Only reached when the key is missing from the compiled flat table —
+    either it's an invalid path (errors are appended here with the same
+    messages the original traversal produced) or a path the flattener
+    skipped, in which case the result is cached back into the table.
+    """
+    field_schema_info = None
+    current_schema_level = compiled.raw
+
+    parts = _split_path(key)
+    temp_path_prefix = path_prefix # Track path within dot notation traversal
+
+    for i, part in enumerate(parts):
+        if not _is_mapping(current_schema_level):
+             errors.append(f"Invalid query path '{current_path}': Trying to access field '{part}' within a non-object schema part at '{temp_path_prefix}'.")
+             return None
+
+        if part not in current_schema_level:
+            # Check if the key is actually an operator applied to the *parent* object/doc
+            # This happens if schema_part is the schema for a document, and key is like '$expr'
+            if part.startswith('$') and i == 0: # Only check operators at the first level of split
+                 # Let operator handling below deal with it, but need parent context. Difficult here.
+                 # For simplicity, we'll assume dot notation *only* refers to nested fields for now.
+                  errors.append(f"Invalid query key '{current_path}': Field '{part}' not found in schema at '{temp_path_prefix}'. Is it a misplaced operator?")
+
+            else:
+                errors.append(f"Invalid query key '{current_path}': Field '{part}' not found in schema at '{temp_path_prefix}'.")
+
+            return None
+
+        # Get the schema for this part
+        field_schema_info = current_schema_level[part]
+
+        # Check if we have the necessary nested schema info ('schema' for objects)
+        if i < len(parts) - 1: # If not the last part, we need to traverse deeper
+            temp_path_prefix = f"{temp_path_prefix}.{part}" if temp_path_prefix else part
+            if 'object' not in field_schema_info.get('types', ()):
+                errors.append(f"Invalid query path '{current_path}': Field '{part}' at '{temp_path_prefix}' is not defined as an 'object' in the schema, cannot traverse further.")
+                return None
+            if 'schema' not in field_schema_info:
+                errors.append(f"Schema definition error: Field '{part}' at '{temp_path_prefix}' is an 'object' but lacks a 'schema' definition.")
+                return None
+            current_schema_level = field_schema_info['schema']
+
+    # Cache the resolved info so the next query using this path is O(1).
+    field_info = FieldInfo(field_schema_info)
+    compiled.paths[key] = field_info
+    return field_info
+
+
+def _check_type_compat(value_bit: int, field_info: "FieldInfo") -> bool:
+    """Returns True if a query value with type bit ``value_bit`` is
+    acceptable for the field described by ``field_info``.
+
+    'null' matches a nullable field (covered by plain membership, since a
+    nullable field carries the null bit in its mask), and the numeric BSON
+    types (int/long/double/decimal) are treated as interchangeable when
+    the schema allows any of them. Both tests are single bitwise ANDs.
+    """
+    if value_bit & field_info.types_mask:
+        return True
+    return bool(value_bit & _NUMERIC_MASK) and field_info.has_numeric
+
+
+# Operator-Specific Validation handlers
+#
+# Each handler has the signature
+# (op, op_value, field_schema_info, field_path, errors, full_schema, stack)
+# and builds its "field.$op" error paths lazily — on the no-error path no
+# path string is formatted at all.
+# and is looked up through _OP_HANDLERS — one dict lookup plus a call per
+# operator instead of walking an if/elif ladder. Operators in
+# QUERY_OPERATORS without a handler (e.g. $mod, $text) are accepted
+# without specific checks, as before.
+
+def _bad_item_types(items: Any, field_info: FieldInfo) -> List[str]:
+    """Returns a sorted list of the item types not acceptable for a field
+    described by ``field_info``, or an empty list if all items pass.
+
+    Batched version of the per-item compat check for $in/$nin/$all: one
+    set comprehension over the items, then a single set difference with
+    the null and numeric-interchange allowances applied once instead of
+    per item.
+    """
+    present = 0
+    for item in items:
+        present |= get_value_type_bit(item)
+    allowed = field_info.types_mask
+    if field_info.has_numeric:
+        allowed |= _NUMERIC_MASK
+    # 'null' needs no special case: its bit only survives in ``bad`` when
+    # the schema doesn't allow it, which is exactly an error.
+    bad = present & ~allowed
+    return _bits_to_names(bad) if bad else []
+
+
+def _check_comparison(op, op_value, field_schema_info, field_path, errors, full_schema, stack):
+    if not field_schema_info.types:
+         errors.append(f"Schema definition error at '{field_path}': Field lacks 'types' definition.")
+    elif not _check_type_compat(get_value_type_bit(op_value), field_schema_info):
+         errors.append(f"Type mismatch for operator '{op}' at '{field_path}.{op}': Query uses type '{get_value_type_name(op_value)}', but schema expects {set(field_schema_info.types)}.")
+
+
+def _check_in_nin(op, op_value, field_schema_info, field_path, errors, full_schema, stack):
+    if not _is_array(op_value):
+        errors.append(f"Invalid value for operator '{op}' at '{field_path}.{op}': Expected an array.")
+        return
+    if not field_schema_info.types:
+         errors.append(f"Schema definition error at '{field_path}': Field lacks 'types' definition.")
+         return
+    bad_types = _bad_item_types(op_value, field_schema_info)
+    if bad_types:
+        errors.append(f"Type mismatch for '{op}' items at '{field_path}.{op}': found types {bad_types}, but schema expects {set(field_schema_info.types)}.")
+
+
+def _check_exists(op, op_value, field_schema_info, field_path, errors, full_schema, stack):
+    if not isinstance(op_value, bool):
+        errors.append(f"Invalid value for operator '{op}' at '{field_path}.{op}': Expected boolean (true/false).")
+
+
+def _check_type(op, op_value, field_schema_info, field_path, errors, full_schema, stack):
+    # Value can be BSON type string or number
+    valid_type_spec = False
+    if isinstance(op_value, str): # BSON type alias
+        valid_type_spec = True # Assume string alias is potentially valid
+    elif isinstance(op_value, int): # BSON type number
+         valid_type_spec = True # Assume number is potentially valid
+    else:
+         errors.append(f"Invalid value for operator '{op}' at '{field_path}.{op}': Expected BSON type string (e.g., 'string') or number (e.g., 2).")
+
+    allowed_types = field_schema_info.types
+    if valid_type_spec and allowed_types:
+         # Simple check: if $type requests a type not listed in schema's *possible* types, it's likely an issue.
+         # Note: This is tricky as $type checks the *actual* BSON type.
+         requested_type_str = str(op_value) # Crude check
+         if requested_type_str not in allowed_types and op_value not in allowed_types:
+            # Basic check - might need refinement based on BSON numbers vs names
+            errors.append(f"Warning: Operator '{op}' at '{field_path}.{op}' checks for type '{op_value}', which might not be among the expected schema types {set(allowed_types)}.")
+
+
+def _check_regex(op, op_value, field_schema_info, field_path, errors, full_schema, stack):
+    if 'string' not in field_schema_info.types:
+        errors.append(f"Usage warning for operator '{op}' at '{field_path}.{op}': Field type is not 'string' in schema ({set(field_schema_info.types)}), $regex might not work as expected.")
+    if not isinstance(op_value, (str, Regex, re.Pattern)):
+         errors.append(f"Invalid value for operator '{op}' at '{field_path}.{op}': Expected a string or regex pattern.")
+    # Could also validate '$options' if present in query_value dict
+
+
+def _check_size(op, op_value, field_schema_info, field_path, errors, full_schema, stack):
+    if not field_schema_info.is_array:
+        errors.append(f"Usage error for operator '{op}' at '{field_path}.{op}': Field type is not 'array' in schema ({set(field_schema_info.types)}).")
+    if not isinstance(op_value, int):
+         errors.append(f"Invalid value for operator '{op}' at '{field_path}.{op}': Expected an integer size.")
+
+
+def _check_all(op, op_value, field_schema_info, field_path, errors, full_schema, stack):
+    element_schema = field_schema_info.element_schema
+    if not field_schema_info.is_array:
+        errors.append(f"Usage error for operator '{op}' at '{field_path}.{op}': Field type is not 'array' in schema ({set(field_schema_info.types)}).")
+    elif not _is_array(op_value):
+        errors.append(f"Invalid value for operator '{op}' at '{field_path}.{op}': Expected an array of elements.")
+    elif element_schema is not None:
+        # Validate each item in $all against the element schema
+        if not element_schema.types:
+            errors.append(f"Schema definition error at '{field_path}': Array field lacks 'element_schema' with 'types'.")
+            return
+        bad_types = _bad_item_types(op_value, element_schema)
+        if bad_types:
+            errors.append(f"Type mismatch for '{op}' items at '{field_path}.{op}': found types {bad_types}, but array element schema expects {set(element_schema.types)}.")
+    else:
+         errors.append(f"Schema definition error at '{field_path}': Array field lacks 'element_schema' definition needed to validate '{op}'.")
+
+
+def _check_elem_match(op, op_value, field_schema_info, field_path, errors, full_schema, stack):
+    element_schema = field_schema_info.element_schema
+    if not field_schema_info.is_array:
+        errors.append(f"Usage error for operator '{op}' at '{field_path}.{op}': Field type is not 'array' in schema ({set(field_schema_info.types)}).")
+    elif not _is_mapping(op_value):
+        errors.append(f"Invalid value for operator '{op}' at '{field_path}.{op}': Expected a query document (dict) for element matching.")
+    elif element_schema is not None:
+        # The element schema might be a primitive type or an object
+        if element_schema.is_object:
+            # Validate the $elemMatch query against the element's object schema
+            nested_elem_schema = element_schema.sub_schema
+            if nested_elem_schema:
+                # Memoized compilation: repeated $elemMatch against the
+                # same element schema reuses the compiled table. Queued as
+                # a stack frame so logical operators within $elemMatch are
+                # handled by the driver loop like any other level.
+                stack.append((op_value, full_schema.sub_schema(nested_elem_schema), f"{field_path}.{op}"))
+            else:
+                 errors.append(f"Schema definition error at '{field_path}': Array element is 'object' but lacks 'schema' in 'element_schema'.")
+        elif element_schema.types:
+             # If element schema is primitive, $elemMatch query should use operators applicable to that type
+             # We need to validate the operators inside op_value against the primitive element_schema
+             _validate_operator_block(op_value, element_schema, f"{field_path}.{op}", errors, full_schema, stack)
+
+        else:
+            errors.append(f"Schema definition error at '{field_path}': Array field 'element_schema' lacks 'types'.")
+
+    else:
+        errors.append(f"Schema definition error at '{field_path}': Array field lacks 'element_schema' definition needed to validate '{op}'.")
+
+
+_OP_HANDLERS = {
+    '$eq': _check_comparison,
+    '$ne': _check_comparison,
+    '$gt': _check_comparison,
+    '$gte': _check_comparison,
+    '$lt': _check_comparison,
+    '$lte': _check_comparison,
+    '$in': _check_in_nin,
+    '$nin': _check_in_nin,
+    '$exists': _check_exists,
+    '$type': _check_type,
+    '$regex': _check_regex,
+    '$size': _check_size,
+    '$all': _check_all,
+    '$elemMatch': _check_elem_match,
+    # Add more operator checks ($mod, $text, $where, geo, etc.) here if needed
+}
+
+
+def _validate_operator_block(op_dict: Dict[str, Any], field_schema_info: FieldInfo, field_path: str, errors: Any, full_schema: CompiledSchema, stack: List[Any]) -> None:
+    """Validates a {'$op': value, ...} block against one field's schema info.
+
+    Shared by the main field branch and by $elemMatch on arrays of
+    primitives, which previously wrapped the element schema in a throwaway
+    {'_field_': ...} document and re-entered the recursive validator.
+    """
+    for op, op_value in op_dict.items():
+        handler = _OP_HANDLERS.get(op)
+        if handler is not None:
+            handler(op, op_value, field_schema_info, field_path, errors, full_schema, stack)
+        elif op not in QUERY_OPERATORS:
+            if op[:1] == '$':
+                errors.append(f"Unknown operator '{op}' used at '{field_path}.{op}'.")
+            else:
+                errors.append(f"Invalid mix of operator and field keys at '{field_path}': key '{op}' is not an operator.")
+        # Known operators without a handler pass through unchecked.
+
+
+def _validate_one_level(query_part: Any, compiled: CompiledSchema, path_prefix: str, errors: Any, stack: List[Any], full_schema: CompiledSchema) -> None:
+    """Validates one level of a query document against a CompiledSchema.
+
+    Nested query documents ($and/$or/$nor elements, $elemMatch on object
+    arrays) are appended to ``stack`` as (query_part, schema, path_prefix)
+    frames for the driver loop in validate_query instead of recursing.
+    """
+
+    if not _is_mapping(query_part):
         # This case should ideally not be hit for the top-level query_doc,
         # but might occur in $not or other nested scenarios incorrectly.
         errors.append(f"Invalid query structure at '{path_prefix}': Expected a dictionary, got {type(query_part).__name__}.")
         return
 
     for key, query_value in query_part.items():
-        current_path = f"{path_prefix}.{key}" if path_prefix else key
+        # Path strings are built lazily per branch: the common no-error
+        # direct-match path never formats one.
 
         # Handle Logical Operators
-        if key in ('$and', '$or', '$nor'):
-            if not isinstance(query_value, Sequence) or isinstance(query_value, (str, bytes)):
+        if key in _LOGICAL_OPS:
+            current_path = f"{path_prefix}.{key}" if path_prefix else key
+            if not _is_array(query_value):
                 errors.append(f"Invalid value for operator '{key}' at '{current_path}': Expected an array of query documents.")
                 continue
             if not query_value:
@@ -86,19 +709,20 @@ def _validate_recursive(query_part, schema_part, errors, path_prefix, full_schem
             # Validate each sub-query against the *full schema*
             for i, sub_query in enumerate(query_value):
                 sub_path = f"{current_path}[{i}]"
-                if not isinstance(sub_query, Mapping):
+                if not _is_mapping(sub_query):
                      errors.append(f"Invalid element in '{key}' array at '{sub_path}': Expected a query document (dict).")
                      continue
-                # Recursive call to the *top-level* validator for each item in $and/$or/$nor
-                _validate_recursive(sub_query, full_schema, errors, path_prefix=f"{sub_path}", full_schema=full_schema)
+                # Queue each item in $and/$or/$nor for the driver loop
+                stack.append((sub_query, full_schema, sub_path))
             continue # Handled this logical operator key
 
         if key == '$not':
+             current_path = f"{path_prefix}.{key}" if path_prefix else key
              # $not can contain a regex or an operator expression
              # We need the schema context of the *field* it applies to, which isn't directly here.
              # This requires rethinking how $not is handled, maybe pass parent schema context?
              # For now, let's do a basic check if it's a dict
-             if not isinstance(query_value, Mapping):
+             if not _is_mapping(query_value):
                  errors.append(f"Invalid value for operator '$not' at '{current_path}': Expected an operator expression (dict).")
              else:
                  # We can't fully validate the inner part without knowing which field's schema applies.
@@ -111,212 +735,35 @@ def _validate_recursive(query_part, schema_part, errors, path_prefix, full_schem
 
 
         # Handle Field Names (Potentially with Dot Notation)
-        field_schema_info = None
-        current_schema_level = schema_part
-
-        # Handle dot notation (e.g., "address.city")
-        parts = key.split('.')
-        valid_path = True
-        temp_path_prefix = path_prefix # Track path within dot notation traversal
-
-        for i, part in enumerate(parts):
-            if not isinstance(current_schema_level, Mapping):
-                 errors.append(f"Invalid query path '{current_path}': Trying to access field '{part}' within a non-object schema part at '{temp_path_prefix}'.")
-                 valid_path = False
-                 break
-
-            if part not in current_schema_level:
-                # Check if the key is actually an operator applied to the *parent* object/doc
-                # This happens if schema_part is the schema for a document, and key is like '$expr'
-                if part.startswith('$') and i == 0: # Only check operators at the first level of split
-                     # Let operator handling below deal with it, but need parent context. Difficult here.
-                     # For simplicity, we'll assume dot notation *only* refers to nested fields for now.
-                      errors.append(f"Invalid query key '{current_path}': Field '{part}' not found in schema at '{temp_path_prefix}'. Is it a misplaced operator?")
-
-                else:
-                    errors.append(f"Invalid query key '{current_path}': Field '{part}' not found in schema at '{temp_path_prefix}'.")
-
-                valid_path = False
-                break
-
-            # Get the schema for this part
-            field_schema_info = current_schema_level[part]
-
-            # Check if we have the necessary nested schema info ('schema' for objects)
-            if i < len(parts) - 1: # If not the last part, we need to traverse deeper
-                temp_path_prefix = f"{temp_path_prefix}.{part}" if temp_path_prefix else part
-                if 'object' not in field_schema_info.get('types', set()):
-                    errors.append(f"Invalid query path '{current_path}': Field '{part}' at '{temp_path_prefix}' is not defined as an 'object' in the schema, cannot traverse further.")
-                    valid_path = False
-                    break
-                if 'schema' not in field_schema_info:
-                    errors.append(f"Schema definition error: Field '{part}' at '{temp_path_prefix}' is an 'object' but lacks a 'schema' definition.")
-                    valid_path = False
-                    break
-                current_schema_level = field_schema_info['schema']
-            else:
-                 # This is the final part of the key, field_schema_info holds its definition
-                 pass
-
-        if not valid_path:
-            continue # Skip validation for this key if path was invalid
+        # Fast path: one flat-table lookup covers both plain and dotted keys.
+        field_schema_info = compiled.paths.get(key)
+        if field_schema_info is None:
+            current_path = f"{path_prefix}.{key}" if path_prefix else key
+            field_schema_info = _resolve_field_info(key, compiled, errors, path_prefix, current_path)
+            if field_schema_info is None:
+                continue # Skip validation for this key if path was invalid
 
         # We found the schema definition for the final field ('field_schema_info')
 
-        # Check if the query value is a direct match or uses operators
-        if isinstance(query_value, Mapping) and any(k.startswith('$') for k in query_value.keys()):
+        # Check if the query value is a direct match or uses operators.
+        # By MongoDB semantics a value dict is either all operators or an
+        # embedded document — mixing is invalid — so the first key decides
+        # in O(1). Mixed dicts in operator mode get a dedicated error from
+        # _validate_operator_block; mixed dicts in embedded-document mode
+        # surface as an ordinary type mismatch.
+        is_operator_block = (_is_mapping(query_value) and query_value
+                             and next(iter(query_value))[:1] == '$')
+
+        if is_operator_block:
             # Value contains operators ($eq, $gt, $in, $elemMatch, etc.)
-            for op, op_value in query_value.items():
-                op_path = f"{current_path}.{op}"
-
-                if op not in QUERY_OPERATORS:
-                    errors.append(f"Unknown operator '{op}' used at '{op_path}'.")
-                    continue
-
-                # Operator-Specific Validation
-                allowed_types = field_schema_info.get('types', set())
-                element_schema = field_schema_info.get('element_schema', None) # For array fields
-
-                if op in ('$eq', '$ne', '$gt', '$gte', '$lt', '$lte'):
-                    op_value_type = get_value_type_name(op_value)
-                    if not allowed_types:
-                         errors.append(f"Schema definition error at '{current_path}': Field lacks 'types' definition.")
-                    elif op_value_type not in allowed_types and 'null' not in allowed_types : # Allow comparison with null if null is allowed type
-                         # Special case: Allow int/long/double/decimal to be compared somewhat interchangeably if any numeric type is allowed
-                         numeric_types = {'int', 'long', 'double', 'decimal'}
-                         if not (op_value_type in numeric_types and bool(allowed_types.intersection(numeric_types))):
-                             errors.append(f"Type mismatch for operator '{op}' at '{op_path}': Query uses type '{op_value_type}', but schema expects {allowed_types}.")
-
-                elif op in ('$in', '$nin'):
-                    if not isinstance(op_value, Sequence) or isinstance(op_value, (str, bytes)):
-                        errors.append(f"Invalid value for operator '{op}' at '{op_path}': Expected an array.")
-                        continue
-                    if not allowed_types:
-                         errors.append(f"Schema definition error at '{current_path}': Field lacks 'types' definition.")
-                         continue
-                    for i, item in enumerate(op_value):
-                        item_type = get_value_type_name(item)
-                        item_path = f"{op_path}[{i}]"
-                        if item_type not in allowed_types and not (item_type == 'null' and 'null' in allowed_types):
-                             numeric_types = {'int', 'long', 'double', 'decimal'}
-                             if not (item_type in numeric_types and bool(allowed_types.intersection(numeric_types))):
-                                errors.append(f"Type mismatch for item in '{op}' array at '{item_path}': Item type is '{item_type}', but schema expects {allowed_types}.")
-
-                elif op == '$exists':
-                    if not isinstance(op_value, bool):
-                        errors.append(f"Invalid value for operator '{op}' at '{op_path}': Expected boolean (true/false).")
-
-                elif op == '$type':
-                    # Value can be BSON type string or number
-                    valid_type_spec = False
-                    if isinstance(op_value, str): # BSON type alias
-                        valid_type_spec = True # Assume string alias is potentially valid
-                    elif isinstance(op_value, int): # BSON type number
-                         valid_type_spec = True # Assume number is potentially valid
-                    else:
-                         errors.append(f"Invalid value for operator '{op}' at '{op_path}': Expected BSON type string (e.g., 'string') or number (e.g., 2).")
-
-                    if valid_type_spec and allowed_types:
-                         # Simple check: if $type requests a type not listed in schema's *possible* types, it's likely an issue.
-                         # Note: This is tricky as $type checks the *actual* BSON type.
-                         requested_type_str = str(op_value) # Crude check
-                         if requested_type_str not in allowed_types and op_value not in allowed_types:
-                            # Basic check - might need refinement based on BSON numbers vs names
-                            errors.append(f"Warning: Operator '{op}' at '{op_path}' checks for type '{op_value}', which might not be among the expected schema types {allowed_types}.")
-
-                elif op == '$regex':
-                     if 'string' not in allowed_types:
-                         errors.append(f"Usage warning for operator '{op}' at '{op_path}': Field type is not 'string' in schema ({allowed_types}), $regex might not work as expected.")
-                     if not isinstance(op_value, (str, Regex, re.Pattern)):
-                          errors.append(f"Invalid value for operator '{op}' at '{op_path}': Expected a string or regex pattern.")
-                     # Could also validate '$options' if present in query_value dict
-
-                elif op == '$size':
-                     if 'array' not in allowed_types:
-                         errors.append(f"Usage error for operator '{op}' at '{op_path}': Field type is not 'array' in schema ({allowed_types}).")
-                     if not isinstance(op_value, int):
-                          errors.append(f"Invalid value for operator '{op}' at '{op_path}': Expected an integer size.")
-
-                elif op == '$all':
-                     if 'array' not in allowed_types:
-                         errors.append(f"Usage error for operator '{op}' at '{op_path}': Field type is not 'array' in schema ({allowed_types}).")
-                     elif not isinstance(op_value, Sequence) or isinstance(op_value, (str, bytes)):
-                         errors.append(f"Invalid value for operator '{op}' at '{op_path}': Expected an array of elements.")
-                     elif element_schema:
-                         # Validate each item in $all against the element schema
-                         elem_allowed_types = element_schema.get('types', set())
-                         if not elem_allowed_types:
-                             errors.append(f"Schema definition error at '{current_path}': Array field lacks 'element_schema' with 'types'.")
-                             continue
-                         for i, item in enumerate(op_value):
-                             item_type = get_value_type_name(item)
-                             item_path = f"{op_path}[{i}]"
-                             if item_type not in elem_allowed_types and not (item_type == 'null' and 'null' in elem_allowed_types):
-                                 numeric_types = {'int', 'long', 'double', 'decimal'}
-                                 if not (item_type in numeric_types and bool(elem_allowed_types.intersection(numeric_types))):
-                                     errors.append(f"Type mismatch for item in '{op}' array at '{item_path}': Item type is '{item_type}', but array element schema expects {elem_allowed_types}.")
-                     else:
-                          errors.append(f"Schema definition error at '{current_path}': Array field lacks 'element_schema' definition needed to validate '{op}'.")
-
-
-                elif op == '$elemMatch':
-                     if 'array' not in allowed_types:
-                         errors.append(f"Usage error for operator '{op}' at '{op_path}': Field type is not 'array' in schema ({allowed_types}).")
-                     elif not isinstance(op_value, Mapping):
-                         errors.append(f"Invalid value for operator '{op}' at '{op_path}': Expected a query document (dict) for element matching.")
-                     elif element_schema:
-                         # The element schema might be a primitive type or an object
-                         elem_types = element_schema.get('types', set())
-                         if 'object' in elem_types:
-                             # Validate the $elemMatch query against the element's object schema
-                             nested_elem_schema = element_schema.get('schema')
-                             if nested_elem_schema:
-                                 _validate_recursive(op_value, nested_elem_schema, errors, path_prefix=f"{op_path}", full_schema=full_schema) # Pass full_schema for logical operators within $elemMatch
-                             else:
-                                  errors.append(f"Schema definition error at '{current_path}': Array element is 'object' but lacks 'schema' in 'element_schema'.")
-                         elif elem_types:
-                              # If element schema is primitive, $elemMatch query should use operators applicable to that type
-                              # We need to validate the operators inside op_value against the primitive element_schema
-                              _validate_recursive_operators_against_schema(op_value, element_schema, errors, op_path, full_schema)
-
-                         else:
-                             errors.append(f"Schema definition error at '{current_path}': Array field 'element_schema' lacks 'types'.")
-
-                     else:
-                         errors.append(f"Schema definition error at '{current_path}': Array field lacks 'element_schema' definition needed to validate '{op}'.")
-
-                # Add more operator checks ($mod, $text, $where, geo, etc.) here if needed
+            field_path = f"{path_prefix}.{key}" if path_prefix else key
+            _validate_operator_block(query_value, field_schema_info, field_path, errors, full_schema, stack)
 
         else:
             # Value is a direct match (implicit $eq)
-            query_value_type = get_value_type_name(query_value)
-            allowed_types = field_schema_info.get('types', set())
-
-            if not allowed_types:
+            if not field_schema_info.types:
+                current_path = f"{path_prefix}.{key}" if path_prefix else key
                 errors.append(f"Schema definition error at '{current_path}': Field lacks 'types' definition.")
-            elif query_value_type not in allowed_types:
-                 # Allow null match if 'null' is an allowed type
-                 if query_value_type == 'null' and 'null' in allowed_types:
-                     pass # Valid null match
-                 else:
-                     # Special case: Allow int/long/double/decimal to match if any numeric type is allowed
-                     numeric_types = {'int', 'long', 'double', 'decimal'}
-                     if not (query_value_type in numeric_types and bool(allowed_types.intersection(numeric_types))):
-                         errors.append(f"Type mismatch for field '{current_path}': Query uses type '{query_value_type}', but schema expects {allowed_types}.")
-
-
-def _validate_recursive_operators_against_schema(operator_query, field_schema, errors, path_prefix, full_schema):
-     """
-     Helper specifically for validating an operator block (like inside $elemMatch for primitives)
-     against a specific field schema definition.
-     """
-     if not isinstance(operator_query, Mapping):
-         errors.append(f"Invalid structure at '{path_prefix}': Expected an operator dictionary.")
-         return
-
-     # Simulate the structure needed by the main validator by wrapping the schema
-     # This is a bit of a hack, cleaner ways might exist
-     temp_wrapper_schema = {"_field_": field_schema}
-     temp_wrapper_query = {"_field_": operator_query}
-
-     _validate_recursive(temp_wrapper_query, temp_wrapper_schema, errors, path_prefix="", full_schema=full_schema) # path_prefix is tricky here, maybe adjust
\ No newline at end of file
+            elif not _check_type_compat(get_value_type_bit(query_value), field_schema_info):
+                current_path = f"{path_prefix}.{key}" if path_prefix else key
+                errors.append(f"Type mismatch for field '{current_path}': Query uses type '{get_value_type_name(query_value)}', but schema expects {set(field_schema_info.types)}.")
@@ -1,9 +1,14 @@
 import re
+import sys
+import threading
 from collections.abc import Mapping, Sequence
 
 # Define known MongoDB query operators (expand as needed)
 # See: https://www.mongodb.com/docs/manual/reference/operator/query/
-KNOWN_QUERY_OPERATORS = {
+# Interned so set/dict probes against query keys hit the pointer-equality
+# fast path first; user-provided strings are never interned, keeping the
+# intern pool free of arbitrary input.
+KNOWN_QUERY_OPERATORS = frozenset(sys.intern(op) for op in {
     # Comparison
     '$eq', '$gt', '$gte', '$in', '$lt', '$lte', '$ne', '$nin',
     # Logical
@@ -23,7 +28,7 @@ KNOWN_QUERY_OPERATORS = {
     '$comment',
     # Projection - Technically not query filter, but might appear
     # '$', '$elemMatch', '$meta', '$slice',
-}
+})
 # Separate regex type check as isinstance doesn't work well directly
 REGEX_TYPES = (re.Pattern, )
 try:
@@ -33,6 +38,239 @@ try:
 except ImportError:
     pass
 
+# Hoisted so the "$regex value" check does not rebuild this tuple per call.
+STR_OR_REGEX_TYPES = (str, ) + REGEX_TYPES
+
+if len(REGEX_TYPES) == 1:
+    # Only re.Pattern: bind its C-level instance check directly.
+    _IS_REGEX = REGEX_TYPES[0].__instancecheck__
+else:
+    def _IS_REGEX(value, _types=REGEX_TYPES):
+        return isinstance(value, _types)
+
+
+# --- Shape-compiled validators -------------------------------------------
+#
+# Syntax validation only ever inspects the *structure* of a query: its keys,
+# nesting, container types and a handful of leaf type checks ($exists must be
+# a bool, $size an int, ...). For a given structural "shape" the traversal is
+# therefore identical on every call, so instead of re-dispatching through the
+# operator if/elif chain for each key we compile each distinct shape once
+# into a specialized straight-line function (paths and static error messages
+# baked in as literals, only the genuinely value-dependent checks left as
+# runtime code) and reuse it for every query with the same shape. Queries
+# using exotic containers (bson.SON, OrderedDict, bytearray, non-string
+# keys) or pathological nesting fall back to the generic recursive walker.
+
+_SHAPE_MAX_DEPTH = 20
+_LEAF = '?'
+
+
+def _shape(node, _depth=0):
+    """Structural signature of node, or None when it is not compilable."""
+    if _depth > _SHAPE_MAX_DEPTH:
+        return None
+    node_type = type(node)
+    if node_type is dict:
+        items = []
+        for key, value in node.items():
+            if type(key) is not str:
+                return None
+            sub = _shape(value, _depth + 1)
+            if sub is None:
+                return None
+            items.append((key, sub))
+        return ('{}', tuple(items))
+    if node_type is list or node_type is tuple:
+        items = []
+        for value in node:
+            sub = _shape(value, _depth + 1)
+            if sub is None:
+                return None
+            items.append(sub)
+        return ('[]', tuple(items))
+    if isinstance(node, (Mapping, Sequence)) and not isinstance(node, (str, bytes)):
+        # Exotic containers keep the generic recursive path.
+        return None
+    return _LEAF
+
+
+def _compile_validator(shape):
+    """Generate a specialized validator function for one query shape.
+
+    The emitted source mirrors the generic syntax walk exactly, but with
+    every structural decision already taken: operator membership, array
+    emptiness, mixed operator/field detection and all path strings are
+    resolved at compile time, leaving only the leaf-value type checks as
+    runtime code.
+    """
+    lines = ['def _compiled(q, errors):']
+    counter = [0]
+
+    def fresh():
+        counter[0] += 1
+        return 'v%d' % counter[0]
+
+    def static(pad, message):
+        lines.append('%serrors.append(%r)' % (pad, message))
+
+    def bad_op_value(pad, key, current_path, expected):
+        static(pad, "Invalid value type for operator '%s' at '%s': %s"
+               % (key, current_path, expected))
+
+    def emit_level(items, var, path_prefix, depth):
+        pad = '    ' * depth
+        for key, sub in items:
+            current_path = "%s.%s" % (path_prefix, key) if path_prefix else key
+            tag = sub if sub is _LEAF else sub[0]
+
+            if key.startswith('$'):
+                if key not in KNOWN_QUERY_OPERATORS:
+                    static(pad, "Unknown operator '%s' used at '%s'." % (key, current_path))
+
+                if key in ('$and', '$or', '$nor'):
+                    if tag != '[]':
+                        bad_op_value(pad, key, current_path, "Expected an array of query documents.")
+                    elif not sub[1]:
+                        static(pad, "Warning: Operator '%s' at '%s' has an empty array." % (key, current_path))
+                    else:
+                        arr = fresh()
+                        lines.append('%s%s = %s[%r]' % (pad, arr, var, key))
+                        for i, element_shape in enumerate(sub[1]):
+                            element_path = '%s[%d]' % (current_path, i)
+                            if element_shape is not _LEAF and element_shape[0] == '{}':
+                                sub_var = fresh()
+                                lines.append('%s%s = %s[%d]' % (pad, sub_var, arr, i))
+                                emit_level(element_shape[1], sub_var, element_path, depth)
+                            else:
+                                prefix = ("Invalid structure at '%s': Expected a dictionary, but found "
+                                          % element_path)
+                                lines.append("%serrors.append(%r + type(%s[%d]).__name__ + '.')"
+                                             % (pad, prefix, arr, i))
+
+                elif key == '$not':
+                    if tag == '{}':
+                        sub_var = fresh()
+                        lines.append('%s%s = %s[%r]' % (pad, sub_var, var, key))
+                        emit_level(sub[1], sub_var, current_path, depth)
+                    elif tag == '[]':
+                        bad_op_value(pad, key, current_path,
+                                     "Expected an operator expression block (dictionary) or a regex pattern.")
+                    else:
+                        lines.append('%sif not _IS_REGEX(%s[%r]):' % (pad, var, key))
+                        bad_op_value(pad + '    ', key, current_path,
+                                     "Expected an operator expression block (dictionary) or a regex pattern.")
+
+                elif key in ('$in', '$nin', '$all'):
+                    if tag != '[]':
+                        bad_op_value(pad, key, current_path, "Expected an array.")
+
+                elif key == '$elemMatch':
+                    if tag == '{}':
+                        sub_var = fresh()
+                        lines.append('%s%s = %s[%r]' % (pad, sub_var, var, key))
+                        emit_level(sub[1], sub_var, current_path, depth)
+                    else:
+                        bad_op_value(pad, key, current_path, "Expected a query document (dictionary).")
+
+                elif key == '$exists':
+                    if tag is not _LEAF:
+                        bad_op_value(pad, key, current_path, "Expected a boolean (true/false).")
+                    else:
+                        lines.append('%sif not isinstance(%s[%r], bool):' % (pad, var, key))
+                        bad_op_value(pad + '    ', key, current_path, "Expected a boolean (true/false).")
+
+                elif key == '$type':
+                    expected = "Expected a BSON type string, number, or an array of strings/numbers."
+                    if tag is _LEAF:
+                        lines.append('%sif not isinstance(%s[%r], (str, int)):' % (pad, var, key))
+                        bad_op_value(pad + '    ', key, current_path, expected)
+                    elif tag == '[]':
+                        if any(element is not _LEAF for element in sub[1]):
+                            bad_op_value(pad, key, current_path, expected)
+                        elif sub[1]:
+                            lines.append('%sif not all(isinstance(item, (str, int)) for item in %s[%r]):'
+                                         % (pad, var, key))
+                            bad_op_value(pad + '    ', key, current_path, expected)
+                        # An empty array vacuously passes the all(...) check.
+                    else:
+                        bad_op_value(pad, key, current_path, expected)
+
+                elif key == '$size':
+                    if tag is not _LEAF:
+                        bad_op_value(pad, key, current_path, "Expected an integer.")
+                    else:
+                        lines.append('%sif not isinstance(%s[%r], int):' % (pad, var, key))
+                        bad_op_value(pad + '    ', key, current_path, "Expected an integer.")
+
+                elif key == '$regex':
+                    if tag is not _LEAF:
+                        bad_op_value(pad, key, current_path, "Expected a string or regex pattern.")
+                    else:
+                        lines.append('%sif not isinstance(%s[%r], STR_OR_REGEX_TYPES):' % (pad, var, key))
+                        bad_op_value(pad + '    ', key, current_path, "Expected a string or regex pattern.")
+
+                elif key == '$mod':
+                    expected = "Expected an array of two numbers [divisor, remainder]."
+                    if tag != '[]' or len(sub[1]) != 2:
+                        bad_op_value(pad, key, current_path, expected)
+                    elif any(element is not _LEAF for element in sub[1]):
+                        bad_op_value(pad, key, current_path, expected)
+                    else:
+                        arr = fresh()
+                        lines.append('%s%s = %s[%r]' % (pad, arr, var, key))
+                        lines.append('%sif not (isinstance(%s[0], (int, float)) and isinstance(%s[1], (int, float))):'
+                                     % (pad, arr, arr))
+                        bad_op_value(pad + '    ', key, current_path, expected)
+
+                # Comparison and other known operators accept any value.
+
+            else:
+                if not key:
+                    static(pad, "Empty field name found at '%s'." % path_prefix)
+                    continue
+
+                if tag == '{}':
+                    first_op = first_field = None
+                    for sub_key, _ in sub[1]:
+                        if sub_key.startswith('$'):
+                            if first_op is None:
+                                first_op = sub_key
+                        elif first_field is None:
+                            first_field = sub_key
+                    if first_op is not None and first_field is not None:
+                        static(pad, "Invalid query structure at '%s': Cannot mix operators (like '%s') "
+                                    "and field names (like '%s') at the same level within a field's value."
+                               % (current_path, first_op, first_field))
+                    elif sub[1]:
+                        sub_var = fresh()
+                        lines.append('%s%s = %s[%r]' % (pad, sub_var, var, key))
+                        emit_level(sub[1], sub_var, current_path, depth)
+                    # else: empty dictionary value, syntactically okay ({field: {}})
+
+                # Lists, primitives, regex patterns etc. are syntactically fine
+                # as an implicit $eq; nothing to emit.
+
+    emit_level(shape[1], 'q', '', 1)
+    if len(lines) == 1:
+        lines.append('    pass')
+
+    namespace = {
+        '_IS_REGEX': _IS_REGEX,
+        'STR_OR_REGEX_TYPES': STR_OR_REGEX_TYPES,
+    }
+    exec(compile('\n'.join(lines), '<query-shape-validator>', 'exec'), namespace)
+    return namespace['_compiled']
+
+
+# Shape -> compiled validator. Capped with FIFO eviction so adversarial
+# streams of unique shapes cannot grow the cache without bound; insertions
+# are guarded by a lock so concurrent callers never observe a half-built
+# cache (a duplicate compile on a race is harmless, the loser just wins).
+_VALIDATOR_CACHE = {}
+_VALIDATOR_CACHE_MAX = 1024
+_VALIDATOR_CACHE_LOCK = threading.Lock()
+
 
 def validate_mongodb_query_syntax(query_doc):
     """
@@ -42,6 +280,10 @@ def validate_mongodb_query_syntax(query_doc):
     structural types for operator values (e.g., arrays for $in, $and; dicts for $not).
     Does NOT validate field names against a schema or data types of values.
 
+    Validators are compiled per query shape and cached, so repeated validation
+    of same-shaped filters (the common case in hot loops) skips the generic
+    recursive traversal entirely.
+
     Args:
         query_doc: The MongoDB query filter document (should be a dictionary).
 
@@ -50,121 +292,306 @@ def validate_mongodb_query_syntax(query_doc):
               the syntax appears valid according to these rules.
     """
     errors = []
-    if not isinstance(query_doc, Mapping):
-        return ["Query root must be a dictionary."]
+    _validate_single(query_doc, errors, [])
+    return errors
+
+
+def validate_many(query_docs):
+    """
+    Validates an iterable of query filter documents in one pass.
+
+    Shares the compiled-shape cache and a single scratch path stack across
+    all documents, so batch callers (e.g. a proxy checking many incoming
+    filters) avoid the per-call setup of validate_mongodb_query_syntax.
+
+    Args:
+        query_docs: An iterable of MongoDB query filter documents.
+
+    Returns:
+        list: One error list per document, in input order. Empty lists mean
+              the corresponding document's syntax appears valid.
+    """
+    path_stack = []
+    results = []
+    for query_doc in query_docs:
+        errors = []
+        _validate_single(query_doc, errors, path_stack)
+        results.append(errors)
+    return results
+
+
+def validate_into(query_doc, errors):
+    """
+    Validates a query filter document, appending errors to a caller-owned list.
+
+    Behaves exactly like validate_mongodb_query_syntax but writes into the
+    supplied list instead of allocating a fresh one, so hot loops can reuse a
+    single cleared buffer per request and avoid churning list objects.
+
+    Args:
+        query_doc: The MongoDB query filter document (should be a dictionary).
+        errors: A list to append error strings to; it is not cleared first.
 
-    _validate_syntax_recursive(query_doc, errors, path_prefix="")
+    Returns:
+        list: The same errors list, for call-site convenience.
+    """
+    _validate_single(query_doc, errors, [])
     return errors
 
-def _validate_syntax_recursive(current_part, errors, path_prefix):
-    """Recursive helper for syntax validation."""
 
-    if not isinstance(current_part, Mapping):
-        # This case can happen inside $and, $or, $elemMatch etc. if structure is wrong
-        errors.append(f"Invalid structure at '{path_prefix}': Expected a dictionary, but found {type(current_part).__name__}.")
+def _validate_single(query_doc, errors, path_stack):
+    """Validate one document, appending error strings into errors."""
+    if not _is_mapping(query_doc):
+        errors.append("Query root must be a dictionary.")
         return
 
-    for key, value in current_part.items():
-        current_path = f"{path_prefix}.{key}" if path_prefix else key
-
-        # --- Check 1: Key is an Operator ---
-        if key.startswith('$'):
-            if key not in KNOWN_QUERY_OPERATORS:
-                errors.append(f"Unknown operator '{key}' used at '{current_path}'.")
-                # Continue checking other keys even if one operator is unknown
-
-            # Check structural type of the value based on the operator
-            if key in ('$and', '$or', '$nor'):
-                if not isinstance(value, Sequence) or isinstance(value, (str, bytes)):
-                    errors.append(f"Invalid value type for operator '{key}' at '{current_path}': Expected an array of query documents.")
-                elif not value:
-                     errors.append(f"Warning: Operator '{key}' at '{current_path}' has an empty array.")
-                else:
-                    # Validate each sub-document in the array
-                    for i, sub_doc in enumerate(value):
-                        _validate_syntax_recursive(sub_doc, errors, path_prefix=f"{current_path}[{i}]")
-
-            elif key == '$not':
-                # $not typically expects an operator expression block (dict) or a regex
-                if not isinstance(value, Mapping) and not isinstance(value, REGEX_TYPES):
-                     errors.append(f"Invalid value type for operator '{key}' at '{current_path}': Expected an operator expression block (dictionary) or a regex pattern.")
-                elif isinstance(value, Mapping):
-                    # Validate the inner expression block
-                     _validate_syntax_recursive(value, errors, path_prefix=current_path)
-                # If it's a regex, syntax is okay
-
-            elif key in ('$in', '$nin', '$all'):
-                 if not isinstance(value, Sequence) or isinstance(value, (str, bytes)):
-                    errors.append(f"Invalid value type for operator '{key}' at '{current_path}': Expected an array.")
-                 # Cannot validate types *within* the array without schema
-
-            elif key == '$elemMatch':
-                if not isinstance(value, Mapping):
-                    errors.append(f"Invalid value type for operator '{key}' at '{current_path}': Expected a query document (dictionary).")
-                else:
-                     _validate_syntax_recursive(value, errors, path_prefix=current_path)
+    shape = _shape(query_doc)
+    if shape is not None:
+        validator = _VALIDATOR_CACHE.get(shape)
+        if validator is None:
+            validator = _compile_validator(shape)
+            with _VALIDATOR_CACHE_LOCK:
+                if len(_VALIDATOR_CACHE) >= _VALIDATOR_CACHE_MAX:
+                    # FIFO eviction: drop the oldest compiled shape.
+                    del _VALIDATOR_CACHE[next(iter(_VALIDATOR_CACHE))]
+                _VALIDATOR_CACHE[shape] = validator
+        validator(query_doc, errors)
+    else:
+        del path_stack[:]
+        _validate_syntax_walk(query_doc, errors, path_stack)
+
+
+def _cache_clear():
+    """Drop all compiled shape validators (primarily for tests)."""
+    with _VALIDATOR_CACHE_LOCK:
+        _VALIDATOR_CACHE.clear()
+
+# Mirror the functools.lru_cache interface so tests can reset compiled state.
+validate_mongodb_query_syntax.cache_clear = _cache_clear
+
+# --- Generic fallback walker ----------------------------------------------
+#
+# Structural expectations per operator, kept declarative so the kind of a
+# value an operator accepts is stated once. Each kind maps to one small
+# checker; the walker dispatches with a single dict lookup instead of
+# scanning tuple literals for every operator key.
+
+# Error message templates, formatted with a single % substitution on the
+# error path instead of per-component f-string opcodes.
+_ERR_OP_VALUE = "Invalid value type for operator '%s' at '%s': %s"
+_ERR_UNKNOWN_OP = "Unknown operator '%s' used at '%s'."
+_ERR_INVALID_STRUCTURE = "Invalid structure at '%s': Expected a dictionary, but found %s."
+_ERR_EMPTY_FIELD = "Empty field name found at '%s'."
+_ERR_MIXED_KEYS = ("Invalid query structure at '%s': Cannot mix operators (like '%s') "
+                   "and field names (like '%s') at the same level within a field's value.")
+_WARN_EMPTY_ARRAY = "Warning: Operator '%s' at '%s' has an empty array."
+
+def _is_mapping(value):
+    # Concrete dicts are the overwhelmingly common case; checking the exact
+    # type first skips the ABC __instancecheck__ machinery, with the
+    # isinstance fallback keeping bson.SON / OrderedDict etc. working.
+    return type(value) is dict or isinstance(value, Mapping)
+
+def _is_array(value):
+    # "Sequence but not a string" appears at every array-operator site; the
+    # concrete list/tuple test covers real queries in one type check.
+    value_type = type(value)
+    if value_type is list or value_type is tuple:
+        return True
+    return isinstance(value, Sequence) and not isinstance(value, (str, bytes))
+
+def _path(path_stack):
+    return '.'.join(path_stack)
+
+def _check_arr_of_docs(value, key, path_stack, errors):
+    if not _is_array(value):
+        errors.append(_ERR_OP_VALUE % (key, _path(path_stack), "Expected an array of query documents."))
+    elif not value:
+        errors.append(_WARN_EMPTY_ARRAY % (key, _path(path_stack)))
+    else:
+        # Schedule each sub-document; the operator segment is swapped for
+        # 'key[i]' so joined paths keep the historical '$and[0]' format.
+        return [(sub_doc, f"{key}[{i}]") for i, sub_doc in enumerate(value)]
+
+def _check_dict_or_regex(value, key, path_stack, errors):
+    # $not typically expects an operator expression block (dict) or a regex
+    is_map = _is_mapping(value)
+    if is_map:
+        # Schedule the inner expression block
+        return [(value, key)]
+    if not _IS_REGEX(value):
+        errors.append(_ERR_OP_VALUE % (key, _path(path_stack), "Expected an operator expression block (dictionary) or a regex pattern."))
+    # If it's a regex, syntax is okay
 
-            elif key == '$exists':
-                 if not isinstance(value, bool):
-                     errors.append(f"Invalid value type for operator '{key}' at '{current_path}': Expected a boolean (true/false).")
+def _check_arr(value, key, path_stack, errors):
+    if not _is_array(value):
+        errors.append(_ERR_OP_VALUE % (key, _path(path_stack), "Expected an array."))
+    # Cannot validate types *within* the array without schema
 
-            elif key == '$type':
-                 # Can be string alias or BSON type number (int) or array of these
+def _check_dict(value, key, path_stack, errors):
+    if not _is_mapping(value):
+        errors.append(_ERR_OP_VALUE % (key, _path(path_stack), "Expected a query document (dictionary)."))
+    else:
+        return [(value, key)]
+
+def _check_bool(value, key, path_stack, errors):
+    if not isinstance(value, bool):
+        errors.append(_ERR_OP_VALUE % (key, _path(path_stack), "Expected a boolean (true/false)."))
+
+def _check_type_spec(value, key, path_stack, errors):
+    # Can be string alias or BSON type number (int) or array of these
+    is_valid_type = False
+    if isinstance(value, (str, int)):
+        is_valid_type = True
+    elif _is_array(value):
+        is_valid_type = True
+        for item in value:
+            if not isinstance(item, (str, int)):
                 is_valid_type = False
-                if isinstance(value, (str, int)):
-                    is_valid_type = True
-                elif isinstance(value, Sequence) and not isinstance(value, (str, bytes)):
-                    is_valid_type = all(isinstance(item, (str, int)) for item in value)
+                break
+
+    if not is_valid_type:
+        errors.append(_ERR_OP_VALUE % (key, _path(path_stack), "Expected a BSON type string, number, or an array of strings/numbers."))
+
+def _check_int(value, key, path_stack, errors):
+    if not isinstance(value, int):
+        errors.append(_ERR_OP_VALUE % (key, _path(path_stack), "Expected an integer."))
+
+def _check_str_or_regex(value, key, path_stack, errors):
+    # Value should be string or regex pattern. $options might be separate or within value dict
+    if not isinstance(value, STR_OR_REGEX_TYPES):
+        errors.append(_ERR_OP_VALUE % (key, _path(path_stack), "Expected a string or regex pattern."))
+
+def _check_num_pair(value, key, path_stack, errors):
+    # $mod has fixed arity, so the two element checks are unrolled instead
+    # of spinning up a generator for all(...).
+    if (not _is_array(value) or len(value) != 2
+            or not isinstance(value[0], (int, float))
+            or not isinstance(value[1], (int, float))):
+        errors.append(_ERR_OP_VALUE % (key, _path(path_stack), "Expected an array of two numbers [divisor, remainder]."))
+
+_OP_VALUE_KIND = {
+    '$and': 'arr_of_docs', '$or': 'arr_of_docs', '$nor': 'arr_of_docs',
+    '$not': 'dict_or_regex',
+    '$in': 'arr', '$nin': 'arr', '$all': 'arr',
+    '$elemMatch': 'dict',
+    '$exists': 'bool',
+    '$type': 'type_spec',
+    '$size': 'int',
+    '$regex': 'str_or_regex',
+    '$mod': 'num_pair',
+    # Structural checks for other operators ($geo*, $text, $where etc.) can
+    # be added here if needed. For many comparison operators ($gt, $lt etc.),
+    # any primitive value is syntactically okay.
+}
+
+_CHECKERS = {
+    'arr_of_docs': _check_arr_of_docs,
+    'dict_or_regex': _check_dict_or_regex,
+    'arr': _check_arr,
+    'dict': _check_dict,
+    'bool': _check_bool,
+    'type_spec': _check_type_spec,
+    'int': _check_int,
+    'str_or_regex': _check_str_or_regex,
+    'num_pair': _check_num_pair,
+}
+
+# Flattened operator -> checker table so the hot loop does one lookup.
+_OP_CHECKS = {op: _CHECKERS[kind] for op, kind in _OP_VALUE_KIND.items()}
 
-                if not is_valid_type:
-                     errors.append(f"Invalid value type for operator '{key}' at '{current_path}': Expected a BSON type string, number, or an array of strings/numbers.")
 
-            elif key == '$size':
-                 if not isinstance(value, int):
-                     errors.append(f"Invalid value type for operator '{key}' at '{current_path}': Expected an integer.")
+def _validate_syntax_walk(current_part, errors, path_stack):
+    """Iterative driver for the generic syntax walk.
 
-            elif key == '$regex':
-                 # Value should be string or regex pattern. $options might be separate or within value dict
-                 if not isinstance(value, (str, ) + REGEX_TYPES):
-                      errors.append(f"Invalid value type for operator '{key}' at '{current_path}': Expected a string or regex pattern.")
+    Runs the traversal over an explicit frame stack instead of the Python
+    call stack, so adversarially deep queries cannot raise RecursionError
+    and no function frame is set up per nesting level. Each level frame
+    holds a live items iterator, so a scheduled child subtree is fully
+    processed before the level resumes with its next key - error ordering
+    is identical to the old recursive walk. path_stack holds the key
+    segments leading to the node being examined and is only joined into a
+    display path when an error is actually reported.
 
-            elif key == '$mod':
-                 if not isinstance(value, Sequence) or isinstance(value, (str, bytes)) or len(value) != 2 or not all(isinstance(v, (int, float)) for v in value):
-                     errors.append(f"Invalid value type for operator '{key}' at '{current_path}': Expected an array of two numbers [divisor, remainder].")
+    Checkers that descend ($and/$or/$nor elements, $not, $elemMatch)
+    return a list of (node, path_segment) children to schedule; all others
+    return None.
+    """
+
+    if not _is_mapping(current_part):
+        # This case can happen inside $and, $or, $elemMatch etc. if structure is wrong
+        errors.append(_ERR_INVALID_STRUCTURE % (_path(path_stack), type(current_part).__name__))
+        return
+
+    # Frame: (is_level, items_or_children_iterator, path length at the frame's base)
+    stack = [(True, iter(current_part.items()), len(path_stack))]
+    while stack:
+        is_level, frame_iter, base = stack[-1]
+        pushed = False
+        if is_level:
+            for key, value in frame_iter:
+                del path_stack[base:]
+
+                # --- Check 1: Key is an Operator ---
+                if key.startswith('$'):
+                    path_stack.append(key)
+                    if key not in KNOWN_QUERY_OPERATORS:
+                        errors.append(_ERR_UNKNOWN_OP % (key, _path(path_stack)))
+                        # Continue checking other keys even if one operator is unknown
 
-            # Add structural checks for other operators ($geo*, $text, $where etc.) if needed
-            # For many comparison operators ($gt, $lt etc.), any primitive value is syntactically okay.
+                    # Check structural type of the value based on the operator
+                    checker = _OP_CHECKS.get(key)
+                    if checker is not None:
+                        children = checker(value, key, path_stack, errors)
+                        if children:
+                            stack.append((False, iter(children), base))
+                            pushed = True
+                            break
 
-        # --- Check 2: Key is a Field Name (or potential dot notation) ---
+                # --- Check 2: Key is a Field Name (or potential dot notation) ---
+                else:
+                    # Basic check for field name validity (cannot be empty)
+                    if not key:
+                        errors.append(_ERR_EMPTY_FIELD % _path(path_stack))
+                        continue
+
+                    # Check the structure of the value associated with the field
+                    if _is_mapping(value):
+                        path_stack.append(key)
+                        # Value is a dictionary. Could be:
+                        # 1. Operator block: {'$gt': 5, '$lt': 10}
+                        # 2. Nested document match: {'subfield': 'value'}
+                        # 3. Invalid mix: {'subfield': 'value', '$gt': 5}
+                        first_op = first_field = None
+                        for k in value:
+                            if k.startswith('$'):
+                                if first_op is None:
+                                    first_op = k
+                            elif first_field is None:
+                                first_field = k
+                            if first_op is not None and first_field is not None:
+                                break
+
+                        if first_op is not None and first_field is not None:
+                            errors.append(_ERR_MIXED_KEYS % (_path(path_stack), first_op, first_field))
+                        elif first_op is not None or first_field is not None:
+                            # Operator block or nested document match
+                            stack.append((False, iter(((value, key),)), base))
+                            pushed = True
+                            break
+                        # else: empty dictionary value, syntactically okay ({field: {}})
+
+                    # If value is a list, primitive, regex pattern etc., it's syntactically fine
+                    # as an implicit $eq or direct match. No further *syntax* check needed here.
         else:
-            # Basic check for field name validity (cannot be empty, cannot start with $)
-            if not key:
-                errors.append(f"Empty field name found at '{path_prefix}'.")
-                continue
-            if key.startswith('$'):
-                # This shouldn't happen if the first check catches operators, but as safeguard
-                errors.append(f"Invalid field name '{key}' starting with '$' at '{current_path}'.")
-                continue
-
-            # Check the structure of the value associated with the field
-            if isinstance(value, Mapping):
-                # Value is a dictionary. Could be:
-                # 1. Operator block: {'$gt': 5, '$lt': 10}
-                # 2. Nested document match: {'subfield': 'value'}
-                # 3. Invalid mix: {'subfield': 'value', '$gt': 5}
-                sub_keys = list(value.keys())
-                has_operators = any(k.startswith('$') for k in sub_keys)
-                has_fields = any(not k.startswith('$') for k in sub_keys)
-
-                if has_operators and has_fields:
-                    errors.append(f"Invalid query structure at '{current_path}': Cannot mix operators (like '{[k for k in sub_keys if k.startswith('$')][0]}') and field names (like '{[k for k in sub_keys if not k.startswith('$')][0]}') at the same level within a field's value.")
-                elif has_operators:
-                    # Assumed to be an operator block, validate recursively
-                    _validate_syntax_recursive(value, errors, path_prefix=current_path)
-                elif has_fields:
-                    # Assumed to be a nested document match, validate recursively
-                     _validate_syntax_recursive(value, errors, path_prefix=current_path)
-                # else: empty dictionary value, syntactically okay ({field: {}})
-
-            # If value is a list, primitive, regex pattern etc., it's syntactically fine
-            # as an implicit $eq or direct match. No further *syntax* check needed here.
\ No newline at end of file
+            for node, segment in frame_iter:
+                del path_stack[base:]
+                path_stack.append(segment)
+                if not _is_mapping(node):
+                    errors.append(_ERR_INVALID_STRUCTURE % (_path(path_stack), type(node).__name__))
+                    continue
+                stack.append((True, iter(node.items()), len(path_stack)))
+                pushed = True
+                break
+        if not pushed:
+            stack.pop()